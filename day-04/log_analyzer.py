@@ -1,19 +1,20 @@
+import os
+import sys
+
+# Counting is done by the DevOps Utilities API's log engine
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "projects", "devops-utilities-api"))
+from services.log_service import analyze_path, level_counts  # noqa: E402
+
+
 def analyze_log_file(log_file_path):
     log_counts = {"INFO": 0, "WARNING": 0, "ERROR": 0}
 
     try:
-        with open(log_file_path, "r") as file:
-            lines = file.readlines()
-            if not lines:
-                print("Log file is empty.")
-                return log_counts
-            for line in lines:
-                if "INFO" in line:
-                    log_counts["INFO"] += 1
-                if "WARNING" in line:
-                    log_counts["WARNING"] += 1
-                if "ERROR" in line:
-                    log_counts["ERROR"] += 1
+        stats = analyze_path(log_file_path)
+        if not stats.total_lines:
+            print("Log file is empty.")
+            return log_counts
+        log_counts = level_counts(stats)
     except FileNotFoundError:
         print(f"Log file '{log_file_path}' not found.")
     except Exception as e:
@@ -23,21 +24,16 @@ def analyze_log_file(log_file_path):
 def write_summary(output_path, counts):
     try:
         with open(output_path, "w") as file:
-            summary = (
-                f"Log Summary:\n"
-                f"INFO: {counts['INFO']}\n"
-                f"WARNING: {counts['WARNING']}\n"
-                f"ERROR: {counts['ERROR']}\n"
-            )
-            file.write(summary)
+            file.write("Log Summary:\n")
+            for level, count in counts.items():
+                file.write(f"{level}: {count}\n")
     except Exception as e:
         print(f"Error writing summary file: {e}")
 
 def print_summary(counts):
     print("Log Summary:")
-    print(f"INFO: {counts['INFO']}")
-    print(f"WARNING: {counts['WARNING']}")
-    print(f"ERROR: {counts['ERROR']}")
+    for level, count in counts.items():
+        print(f"{level}: {count}")
 
 def main():
     log_file = "app.log"
@@ -1,26 +1,24 @@
+import os
+import sys
+
+# Reuse the log engine of the DevOps Utilities API project
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "projects", "devops-utilities-api"))
+from services.log_service import analyze_path, level_counts  # noqa: E402
+
+
 class LogAnalyzer:
     def __init__(self, log_file):
         self.log_file = log_file
-        self.counts = {"INFO": 0, "WARNING": 0, "ERROR": 0, "UNKNOWN": 0}
+        self.counts = {}
 
-    def read_logs(self):
+    def analyze_logs(self):
         try:
-            with open(self.log_file, "r") as f:
-                return f.readlines()
+            stats = analyze_path(self.log_file)
         except FileNotFoundError:
             print("Log file not found:", self.log_file)
-            return []
-
-    def analyze_logs(self, lines):
-        for line in lines:
-            if "INFO" in line:
-                self.counts["INFO"] += 1
-            elif "WARNING" in line:
-                self.counts["WARNING"] += 1
-            elif "ERROR" in line:
-                self.counts["ERROR"] += 1
-            else:
-                self.counts["UNKNOWN"] += 1
+            return {}
+        if stats.total_lines:
+            self.counts = level_counts(stats)
         return self.counts
 
     def print_summary(self):
@@ -30,11 +28,9 @@ class LogAnalyzer:
 
 def main():
     analyzer = LogAnalyzer("app.log")
-    lines = analyzer.read_logs()
-    if not lines:
+    if not analyzer.analyze_logs():
         print("No logs to analyze.")
         return
-    analyzer.analyze_logs(lines)
     analyzer.print_summary()
 
 if __name__ == "__main__":
@@ -1,5 +1,13 @@
 # Day 05 - Log Analyzer (Sample File For your Reference)
 
+import os
+import sys
+
+# Lines are counted by the log engine shared with the DevOps Utilities API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "projects", "devops-utilities-api"))
+from services.log_service import analyze_path, level_counts  # noqa: E402
+
+
 class LogAnalyzer:
     def __init__(self, log_file):
         """
@@ -7,33 +15,20 @@ class LogAnalyzer:
         the values into class variables.
         """
         self.log_file = log_file
-        self.counts = {"INFO": 0, "WARNING": 0, "ERROR": 0, "UNKNOWN": 0}
+        self.counts = {}
 
-    def read_logs(self):
+    def analyze(self):
         """
-        Function to read logs from the given log file
+        Analyzer to count the log levels, streaming the file
+        through the shared log engine (no readlines() into memory)
         """
         try:
-            with open(self.log_file, "r") as f:
-                return f.readlines()
+            stats = analyze_path(self.log_file)
         except FileNotFoundError:
             print("Log file not found:", self.log_file)
-            return []
-
-    def analyze(self, lines):
-        """
-        Analyzer to count the error patterns & Counts
-        """
-        for line in lines:
-            if "INFO" in line:
-                self.counts["INFO"] += 1
-            elif "WARNING" in line:
-                self.counts["WARNING"] += 1
-            elif "ERROR" in line:
-                self.counts["ERROR"] += 1
-            else:
-                self.counts["UNKNOWN"] += 1
-
+            return {}
+        if stats.total_lines:
+            self.counts = level_counts(stats)
         return self.counts
 
 
@@ -42,14 +37,12 @@ def main():
     Main Function as a single entrypoint to the program
     """
     analyzer = LogAnalyzer("app.log")
-    lines = analyzer.read_logs()
+    result = analyzer.analyze()
 
-    if not lines:
+    if not result:
         print("No logs to analyze.")
         return
 
-    result = analyzer.analyze(lines)
-
     print("Log Analysis Summary:")
     for level, count in result.items():
         print(f"{level}: {count}")
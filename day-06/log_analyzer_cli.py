@@ -1,63 +1,264 @@
 import argparse
+import glob
+import json
+import os
+import sys
+
+# Lines are counted by the log engine shared with the DevOps Utilities API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "projects", "devops-utilities-api"))
+from services.log_bursts import detect_bursts  # noqa: E402
+from services.log_follow import LogFollower  # noqa: E402
+from services.log_service import (  # noqa: E402
+    AUTO_FORMAT,
+    LOG_FORMATS,
+    LOG_LEVELS,
+    STANDARD_FORMAT,
+    FleetStats,
+    LogStats,
+    analyze_path,
+    iter_log_files,
+    level_counts,
+)
+
+OUTPUT_FORMATS = ("text", "json", "ndjson")
+DEFAULT_SUMMARY_FILE = "log_summary.txt"
+
+
+def expand_files(patterns):
+    """Expand glob patterns (e.g. quoted '/var/log/*/*.log') into an ordered list of paths without duplicates."""
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern])
+    return list(dict.fromkeys(paths))
+
 
 class LogAnalyzer:
-    def __init__(self, log_file):
+    def __init__(self, log_file, log_format=AUTO_FORMAT):
         self.log_file = log_file
-        self.counts = {"INFO": 0, "WARNING": 0, "ERROR": 0, "UNKNOWN": 0}
+        self.log_format = log_format
+        self.stats = None
+        self.counts = {}
+        self.bursts = None
 
-    def read_logs(self):
+    def analyze_logs(self, jobs=1, level_filter=None):
+        """Count the whole file, split across `jobs` worker processes when it is large."""
         try:
-            with open(self.log_file, "r") as f:
-                return f.readlines()
+            self.stats = analyze_path(self.log_file, workers=jobs, log_format=self.log_format)
         except FileNotFoundError:
             print(f"Error: Log file '{self.log_file}' not found.")
-            return []
-
-    def analyze_logs(self, lines, level_filter=None):
-        for line in lines:
-            if "INFO" in line:
-                self.counts["INFO"] += 1
-            elif "WARNING" in line:
-                self.counts["WARNING"] += 1
-            elif "ERROR" in line:
-                self.counts["ERROR"] += 1
-            else:
-                self.counts["UNKNOWN"] += 1
+            return {}
+        except (OSError, ValueError) as e:
+            # Unreadable, corrupt or truncated compressed file, or an unparseable format
+            print(f"Error: Cannot analyze '{self.log_file}': {e}")
+            return {}
+        if not self.stats.total_lines:
+            return {}
+        return self.load_stats(self.stats, level_filter)
+
+    def load_stats(self, stats, level_filter=None):
+        """Take the counts from an already analyzed LogStats (e.g. from a multi-file run)."""
+        self.stats = stats
+        self.log_format = stats.log_format
+        self.counts = level_counts(stats)
+        self.apply_filter(level_filter)
+        return self.counts
+
+    def follow(self, level_filter=None, poll_interval=1.0):
+        """Count the file, then keep counting appended lines live until Ctrl-C (survives rotation)."""
+        if not os.path.exists(self.log_file):
+            print(f"Error: Log file '{self.log_file}' not found.")
+            return {}
+        self.stats = LogStats(log_format=self.log_format)
+        total = -1
+        try:
+            follower = LogFollower(self.log_file, poll_interval=poll_interval)
+        except OSError as e:
+            print(f"Error: Cannot follow '{self.log_file}': {e}")
+            return {}
+        with follower:
+            try:
+                while True:
+                    self.stats.add_lines(follower.read_lines())
+                    if self.stats.total_lines != total:
+                        total = self.stats.total_lines
+                        self.counts = level_counts(self.stats)
+                        self.apply_filter(level_filter)
+                        print("\r" + "  ".join(f"{k}: {v}" for k, v in self.counts.items()), end="", flush=True)
+                    follower.wait(60)
+            except KeyboardInterrupt:
+                print()
+        self.log_format = self.stats.log_format
+        self.counts = level_counts(self.stats)
+        self.apply_filter(level_filter)
+        return self.counts if self.stats.total_lines else {}
+
+    def apply_filter(self, level_filter):
         if level_filter:
             # Only keep the requested log level and 'UNKNOWN'
             self.counts = {k: v for k, v in self.counts.items() if k == level_filter or k == "UNKNOWN"}
-        return self.counts
+
+    def detect_bursts(self, **options):
+        """Find windows where the ERROR/CRITICAL rate spikes above its baseline."""
+        self.bursts = detect_bursts(zip(self.stats.error_minutes, self.stats.error_counts), **options)
+        return self.bursts
+
+    def summary_lines(self):
+        lines = ["Log Analysis Summary:"]
+        if self.log_format not in (AUTO_FORMAT, STANDARD_FORMAT):
+            lines.append(f"Format: {self.log_format}")
+        lines += [f"{level}: {count}" for level, count in self.counts.items()]
+        if self.bursts is not None:
+            lines.append(f"\nError Bursts: {self.bursts['bursts_total']}")
+            for burst in self.bursts["bursts"]:
+                lines.append(
+                    f"{burst['start']} - {burst['end']}: {burst['errors']} errors, "
+                    f"peak {burst['peak_rate_per_minute']}/min (baseline {burst['baseline_rate_per_minute']}/min)"
+                )
+        return lines
 
     def write_summary(self, output_file):
         try:
             with open(output_file, "w") as f:
-                f.write("Log Analysis Summary:\n")
-                for level, count in self.counts.items():
-                    f.write(f"{level}: {count}\n")
+                f.write("\n".join(self.summary_lines()) + "\n")
         except Exception as e:
             print(f"Error writing summary file: {e}")
 
     def print_summary(self):
-        print("Log Analysis Summary:")
-        for level, count in self.counts.items():
-            print(f"{level}: {count}")
+        print("\n".join(self.summary_lines()))
+
+def burst_options(args):
+    return {"window": args.burst_window, "factor": args.burst_factor, "min_errors": args.burst_min_errors}
+
+
+def analyze_files(paths, args, fleet):
+    """
+    Analyze many files in `args.jobs` worker processes, merging them into `fleet`.
+
+    Yields (path, LogStats or error, record) per file in input order as soon
+    as it is ready; records have the shape POST /logs/analyze/batch returns,
+    with an `error` for a file that could not be read.
+    """
+    for path, result in iter_log_files(paths, workers=args.jobs, log_format=args.format):
+        record = fleet.add(path, result, args.level)
+        if args.bursts and isinstance(result, LogStats):
+            record["error_bursts"] = detect_bursts(zip(result.error_minutes, result.error_counts), **burst_options(args))
+        yield path, result, record
+
+
+def write_records(paths, args, out):
+    """Write the per-file records and the merged total as JSON or NDJSON; return how many files failed."""
+    fleet = FleetStats()
+    files = []
+    for _, _, record in analyze_files(paths, args, fleet):
+        if args.output_format == "ndjson":
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+        else:
+            files.append(record)
+
+    summary = fleet.summary()
+    if args.output_format == "ndjson":
+        out.write(json.dumps({"fleet": summary}) + "\n")
+    else:
+        json.dump({"files": files, "fleet": summary}, out, indent=2)
+        out.write("\n")
+    return summary["files_failed"]
+
+
+def summarize_files(paths, args):
+    """Text summaries of many files followed by their merged total; return (lines, files failed)."""
+    fleet = FleetStats()
+    lines = []
+    for path, result, record in analyze_files(paths, args, fleet):
+        lines.append(f"==> {path} <==")
+        if "error" in record:
+            lines += [f"Error: {record['error']}", ""]
+            continue
+        analyzer = LogAnalyzer(path)
+        analyzer.load_stats(result, args.level)
+        if args.bursts:
+            analyzer.bursts = record["error_bursts"]
+        lines += analyzer.summary_lines() + [""]
+
+    total = LogAnalyzer("total")
+    total.load_stats(fleet.stats, args.level)
+    summary = fleet.summary()
+    lines.append(f"==> total: {summary['files_analyzed']} of {summary['files_total']} files <==")
+    lines += total.summary_lines()[1:]
+    return lines, summary["files_failed"]
+
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze logs and print summary.")
-    parser.add_argument("--file", required=True, help="Path to log file (input)")
-    parser.add_argument("--out", default="log_summary.txt", help="Output file for summary")
-    parser.add_argument("--level", choices=["INFO", "WARNING", "ERROR"], help="Filter by log level")
+    parser.add_argument("--file", required=True, nargs="+", action="extend",
+                        help="Log file(s) to analyze; glob patterns such as '/var/log/*/*.log' are expanded")
+    parser.add_argument("--out", help=f"Output file (default: {DEFAULT_SUMMARY_FILE} for text, stdout for json/ndjson)")
+    parser.add_argument("--output-format", default="text", choices=OUTPUT_FORMATS,
+                        help="text summary, one JSON document, or NDJSON with one record per file "
+                             "followed by the merged total (default: text)")
+    parser.add_argument("--level", choices=LOG_LEVELS, help="Filter by log level")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes: files analyzed at once, or chunks of a single large file (default: 1)")
+    parser.add_argument("--bursts", action="store_true", help="Report error bursts (spikes in the error rate)")
+    parser.add_argument("--burst-window", type=int, default=5, help="Burst sliding window in minutes (default: 5)")
+    parser.add_argument("--burst-factor", type=float, default=3.0,
+                        help="Error rate over baseline that counts as a burst (default: 3.0)")
+    parser.add_argument("--burst-min-errors", type=int, default=10,
+                        help="Minimum errors in a window for a burst (default: 10)")
+    parser.add_argument("--format", default=AUTO_FORMAT, choices=(AUTO_FORMAT, *LOG_FORMATS),
+                        help="Line format (default: auto-detect from the first lines of each file)")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep counting new lines as they are written, until Ctrl-C (like tail -F)")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Seconds between checks when inotify is unavailable (default: 1.0)")
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.burst_window < 1:
+        parser.error("--burst-window must be at least 1")
+    if args.poll_interval <= 0:
+        parser.error("--poll-interval must be positive")
+    paths = expand_files(args.file)
+    if not paths:
+        parser.error("no log files matched --file")
+    if args.follow and (args.jobs > 1 or len(paths) > 1 or args.output_format != "text"):
+        parser.error("--follow takes a single file and cannot be combined with --jobs or --output-format")
+
+    if args.output_format != "text":
+        if not args.out:
+            return 1 if write_records(paths, args, sys.stdout) else 0
+        with open(args.out, "w") as out:
+            failed = write_records(paths, args, out)
+        print(f"Summary written to {args.out}", file=sys.stderr)
+        return 1 if failed else 0
+
+    out_file = args.out or DEFAULT_SUMMARY_FILE
+    if len(paths) > 1:
+        lines, failed = summarize_files(paths, args)
+        print("\n".join(lines))
+        try:
+            with open(out_file, "w") as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"Error writing summary file: {e}")
+            return 1
+        print(f"\nSummary written to {out_file}")
+        return 1 if failed else 0
 
-    analyzer = LogAnalyzer(args.file)
-    lines = analyzer.read_logs()
-    if not lines:
+    analyzer = LogAnalyzer(paths[0], log_format=args.format)
+    if args.follow:
+        if not analyzer.follow(level_filter=args.level, poll_interval=args.poll_interval):
+            print("No logs to analyze or file not found.")
+            return 1
+    elif not analyzer.analyze_logs(jobs=args.jobs, level_filter=args.level):
         print("No logs to analyze or file not found.")
-        return
-    analyzer.analyze_logs(lines, level_filter=args.level)
+        return 1
+    if args.bursts:
+        analyzer.detect_bursts(**burst_options(args))
     analyzer.print_summary()
-    analyzer.write_summary(args.out)
-    print(f"\nSummary written to {args.out}")
+    analyzer.write_summary(out_file)
+    print(f"\nSummary written to {out_file}")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
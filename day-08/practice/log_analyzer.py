@@ -1,4 +1,10 @@
 import json
+import os
+import sys
+
+# Log levels come from the engine in projects/devops-utilities-api
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "projects", "devops-utilities-api"))
+from services.log_service import analyze_path, level_counts  # noqa: E402
 
 class LogAnalyzer: # creating class
     """
@@ -9,35 +15,16 @@ class LogAnalyzer: # creating class
         self.file_name = file_name
         self.output_file = output_file
 
-    def read_logs(self):
-        #option 2
-        with open(self.file_name,"r") as file: # file open
-            return file.readlines() # file operation
-        
     def write_json(self,counts):
         with open(self.output_file,"w+") as json_file:
             json.dump(counts,json_file)
 
     def analyze(self):
-        log_count = {
-            "INFO": 0,
-            "WARNING":0,
-            "ERROR":0
-        }
-        lines = self.read_logs()
-
-        for line in lines:
-            if "INFO" in line:
-                log_count.update({"INFO": log_count["INFO"]+1})
-            elif "WARNING" in line:
-                log_count.update({"WARNING": log_count["WARNING"]+1})
-            elif "ERROR" in line:
-                log_count.update({"ERROR": log_count["ERROR"]+1})
-            else:
-                pass
+        stats = analyze_path(self.file_name) # streams the file, no readlines()
+        log_count = level_counts(stats)
 
         self.write_json(log_count)
-
+        return log_count
 
 
 # modular
@@ -5,30 +5,23 @@ app = FastAPI()
 
 # --- Log Analyzer (reuse your own class design as needed) ---
 import os
+import sys
+
+# Same engine as the DevOps Utilities API's /logs/analyze
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "projects", "devops-utilities-api"))
+from services.log_service import analyze_path, level_counts  # noqa: E402
 
 class LogAnalyzer:
     def __init__(self, log_file):
         self.log_file = log_file
-        self.counts = {"INFO": 0, "WARNING": 0, "ERROR": 0, "UNKNOWN": 0}
+        self.counts = {}
 
-    def read_logs(self):
+    def analyze(self):
         try:
-            with open(self.log_file, "r") as f:
-                return f.readlines()
+            stats = analyze_path(self.log_file)
         except Exception:
-            return []
-
-    def analyze(self, lines):
-        self.counts = {k:0 for k in self.counts}
-        for line in lines:
-            if "INFO" in line:
-                self.counts["INFO"] += 1
-            elif "WARNING" in line:
-                self.counts["WARNING"] += 1
-            elif "ERROR" in line:
-                self.counts["ERROR"] += 1
-            else:
-                self.counts["UNKNOWN"] += 1
+            return {}
+        self.counts = level_counts(stats) if stats.total_lines else {}
         return self.counts
 
 LOG_FILE_PATH = os.environ.get("LOG_FILE_PATH", "app.log")
@@ -40,10 +33,9 @@ def health():
 @app.get("/logs")
 def logs():
     analyzer = LogAnalyzer(LOG_FILE_PATH)
-    lines = analyzer.read_logs()
-    if not lines:
+    summary = analyzer.analyze()
+    if not summary:
         return {"error": f"Log file '{LOG_FILE_PATH}' not found or empty."}
-    summary = analyzer.analyze(lines)
     return summary
 
 # --- Optional: include AWS endpoint if you wish and boto3 is set up ---
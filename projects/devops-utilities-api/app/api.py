@@ -1,13 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI  # Importing FastAPI Class
-from routers import metrics, aws, logs
+from routers import metrics, aws, logs, prometheus
+from services.log_service import shutdown_workers
+from services.metrics_service import sampler
+from services.request_stats import RequestStatsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Metrics are sampled in the background for the whole life of the app;
+    # log worker processes are started on demand and stopped with it
+    sampler.start()
+    yield
+    sampler.stop()
+    shutdown_workers()
+
 
 app = FastAPI(
     title="Internal DevOps Utilities API",
     description="This is an Internal API Utilities App for Monitoring Metrics, AWS Usage, Log Analysis, etc.",
     version="1.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
+app.add_middleware(RequestStatsMiddleware)
 
 
 @app.get("/", tags=["Health"])
@@ -21,4 +38,5 @@ def hello():
 # ── Routers ──────────────────────────────────────────────
 app.include_router(metrics.router, prefix="/system", tags=["System Metrics"])
 app.include_router(aws.router,     prefix="/aws",    tags=["AWS"])
-app.include_router(logs.router,    prefix="/logs",   tags=["Log Analysis"])
\ No newline at end of file
+app.include_router(logs.router,    prefix="/logs",   tags=["Log Analysis"])
+app.include_router(prometheus.router,                 tags=["Prometheus"])
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Deterministic synthetic log generator for benchmarks.
+
+Writes lines in the `YYYY-MM-DD HH:MM:SS LEVEL message` layout with a
+configurable level mix, a ratio of malformed lines and periodic error bursts.
+The same arguments and seed always produce byte-identical files.
+
+Usage (from the project root):
+    python benchmarks/generate_logs.py --size 100MB --out /tmp/bench.log
+"""
+import argparse
+import random
+import re
+from datetime import datetime, timedelta
+
+DEFAULT_MIX = {"INFO": 70, "WARNING": 12, "ERROR": 8, "DEBUG": 9, "CRITICAL": 1}
+
+MESSAGES = {
+    "INFO": [
+        "Request {rid} served in {ms} ms for user {user}",
+        "Connected to database replica {host}",
+        "Cache hit ratio at {pct}%",
+        "Scheduled job {job} completed",
+    ],
+    "WARNING": [
+        "High memory usage detected: {pct}%",
+        "Slow query took {ms} ms on {host}",
+        "Retrying request {rid} (attempt {n} of 3)",
+    ],
+    "ERROR": [
+        "Timeout connecting to {host}",
+        "Failed to fetch user data for user {user}",
+        "Database timeout occurred on {host} after {ms} ms",
+    ],
+    "DEBUG": [
+        "Loading configuration from /etc/app/{job}.yaml",
+        "Payload size {ms} bytes for request {rid}",
+    ],
+    "CRITICAL": [
+        "Disk usage reached {pct}% on {host} - immediate action required",
+    ],
+}
+
+MALFORMED = [
+    "Traceback (most recent call last):",
+    '  File "/srv/app/worker.py", line {n}, in handle',
+    "    raise TimeoutError(\"upstream timed out\")",
+    "{ts} TRACE entering handler {job}",
+    "--- log truncated ---",
+    "",
+]
+
+# Placeholder values, drawn only for the placeholders a message actually uses
+FIELDS = {
+    "rid": lambda rng: rng.randrange(1 << 32),
+    "ms": lambda rng: rng.randrange(1, 30000),
+    "user": lambda rng: rng.randrange(100000),
+    "host": lambda rng: f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+    "pct": lambda rng: rng.randrange(50, 100),
+    "job": lambda rng: rng.choice(("backup", "rotate", "sync", "report")),
+    "n": lambda rng: rng.randrange(1, 400),
+}
+
+
+class _Fields(dict):
+    def __init__(self, rng: random.Random, timestamp: str):
+        super().__init__(ts=timestamp)
+        self.rng = rng
+
+    def __missing__(self, key):
+        return FIELDS[key](self.rng)
+
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "B": 1, "K": 1 << 10, "KB": 1 << 10, "M": 1 << 20, "MB": 1 << 20, "G": 1 << 30, "GB": 1 << 30}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as "512KB", "100MB" or "10GB" (1024-based) into bytes."""
+    match = _SIZE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size '{value}'. Expected e.g. 1MB, 500MB, 10GB")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def parse_mix(value: str) -> dict:
+    """Parse a level mix such as "INFO=70,WARNING=12,ERROR=8" into weights."""
+    mix = {}
+    for item in value.split(","):
+        level, _, weight = item.partition("=")
+        if level.strip().upper() not in MESSAGES:
+            raise ValueError(f"Unknown level '{level}' in mix")
+        mix[level.strip().upper()] = float(weight)
+    return mix
+
+
+def generate_log(
+    path: str,
+    size: int,
+    seed: int = 42,
+    mix: dict = None,
+    malformed_ratio: float = 0.01,
+    lines_per_second: int = 50,
+    burst_every: int = 3600,
+    burst_length: int = 120,
+    burst_error_ratio: float = 0.6,
+    start: str = "2025-01-10 00:00:00",
+) -> dict:
+    """
+    Write a synthetic log of at least `size` bytes to `path`.
+
+    The clock advances `lines_per_second` lines per second. For the first
+    `burst_length` seconds of every `burst_every` seconds, `burst_error_ratio`
+    of the lines are forced to ERROR to simulate an error storm.
+
+    Returns:
+        dict: Bytes and lines written plus the per-level line counts.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    levels, weights = list(mix), list(mix.values())
+    # Pre-drawn level table: one randrange per line instead of choices()
+    table = rng.choices(levels, weights, k=4096)
+    clock = datetime.fromisoformat(start)
+
+    written = lines = 0
+    counts = {level: 0 for level in MESSAGES}
+    counts["MALFORMED"] = 0
+    second, timestamp = -1, ""
+    batch = []
+
+    with open(path, "w", newline="\n") as f:
+        while written < size:
+            elapsed = lines // lines_per_second
+            if elapsed != second:
+                second = elapsed
+                timestamp = (clock + timedelta(seconds=elapsed)).strftime("%Y-%m-%d %H:%M:%S")
+                in_burst = burst_every > 0 and elapsed % burst_every < burst_length
+
+            fields = _Fields(rng, timestamp)
+            if rng.random() < malformed_ratio:
+                line = rng.choice(MALFORMED).format_map(fields)
+                counts["MALFORMED"] += 1
+            else:
+                level = "ERROR" if in_burst and rng.random() < burst_error_ratio else table[rng.randrange(4096)]
+                line = f"{timestamp} {level} {rng.choice(MESSAGES[level]).format_map(fields)}"
+                counts[level] += 1
+
+            batch.append(line)
+            lines += 1
+            written += len(line) + 1
+            if len(batch) >= 10000:
+                f.write("\n".join(batch) + "\n")
+                batch.clear()
+
+        if batch:
+            f.write("\n".join(batch) + "\n")
+
+    return {"path": path, "bytes": written, "lines": lines, "counts": counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic log file.")
+    parser.add_argument("--out", required=True, help="Output log file path")
+    parser.add_argument("--size", default="10MB", help="Target size, e.g. 1MB, 500MB, 10GB (default: 10MB)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--mix", type=parse_mix, default=None,
+                        help="Level weights, e.g. INFO=70,WARNING=12,ERROR=8,DEBUG=9,CRITICAL=1")
+    parser.add_argument("--malformed", type=float, default=0.01, help="Ratio of malformed lines (default: 0.01)")
+    parser.add_argument("--rate", type=int, default=50, help="Lines per second of log time (default: 50)")
+    parser.add_argument("--burst-every", type=int, default=3600, help="Seconds between error bursts (0 disables)")
+    parser.add_argument("--burst-length", type=int, default=120, help="Length of an error burst in seconds")
+    parser.add_argument("--burst-error-ratio", type=float, default=0.6, help="Share of ERROR lines during a burst")
+    args = parser.parse_args()
+
+    info = generate_log(
+        args.out,
+        parse_size(args.size),
+        seed=args.seed,
+        mix=args.mix,
+        malformed_ratio=args.malformed,
+        lines_per_second=args.rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        burst_error_ratio=args.burst_error_ratio,
+    )
+    print(f"Wrote {info['lines']:,} lines ({info['bytes'] / (1 << 20):.1f} MB) to {info['path']}")
+    for level, count in info["counts"].items():
+        print(f"  {level}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
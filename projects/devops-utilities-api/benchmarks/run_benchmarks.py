@@ -0,0 +1,328 @@
+"""
+Benchmark every log analyzer implementation on a (synthetic) log file.
+
+Each analyzer runs in its own subprocess so its peak RSS is measured in
+isolation. Reports latency percentiles, throughput (MB/s, lines/s) and peak
+RSS (of the analyzer process, and separately of its largest worker process),
+and saves the results as JSON so runs can be compared. On Linux the peak RSS
+covers the timed runs only, not the untimed setup before them. Throughput is
+relative to the whole file, so for log_service.incremental.resumed (which
+parses only the last INCREMENTAL_APPEND_BYTES) it is the effective rate.
+
+Usage (from the project root):
+    python benchmarks/run_benchmarks.py --size 100MB --iterations 5
+    python benchmarks/run_benchmarks.py --file /var/log/app.log --analyzers log_service.mmap
+    python benchmarks/run_benchmarks.py --size 100MB --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REPO_DIR = os.path.abspath(os.path.join(PROJECT_DIR, "..", ".."))
+sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.generate_logs import generate_log, parse_size  # noqa: E402
+
+DATA_DIR = os.path.join(PROJECT_DIR, "benchmarks", "data")
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+
+# Bytes appended to the log between checkpoint and timed run in log_service.incremental.resumed
+INCREMENTAL_APPEND_BYTES = 1 << 20
+
+
+def _load_module(name: str, relative_path: str):
+    """Import a standalone script (e.g. a day-xx analyzer) by file path."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ── Analyzer implementations ─────────────────────────────
+# Each factory receives the log path, does any untimed setup and returns the
+# zero-argument callable that is timed. A `prepare` attribute on it is called,
+# untimed, before every run.
+
+def _log_service(**options):
+    def factory(path):
+        from services.log_service import analyze_log_file
+        return lambda: analyze_log_file(path, **options)
+    return factory
+
+
+def _log_service_incremental_cold(path):
+    from services import log_service
+
+    def run():
+        # No checkpoint: the whole file is parsed, as on the first call
+        log_service._checkpoints.clear()
+        return log_service.analyze_log_file(path, incremental=True)
+    return run
+
+
+def _log_service_incremental_resumed(path):
+    from services import log_service
+
+    # A scratch copy that is cut back and regrown before every run, so each
+    # timed run resumes from a checkpoint and parses only the appended tail
+    scratch = tempfile.TemporaryDirectory()
+    copy = os.path.join(scratch.name, os.path.basename(path))
+    shutil.copyfile(path, copy)
+    with open(path, "rb") as f:
+        # The tail starts at the first line that begins in the last INCREMENTAL_APPEND_BYTES
+        cut = max(os.fstat(f.fileno()).st_size - INCREMENTAL_APPEND_BYTES, 0)
+        if cut:
+            f.seek(cut - 1)
+            cut += len(f.readline()) - 1
+
+    def prepare():
+        os.truncate(copy, cut)
+        log_service._checkpoints.clear()
+        log_service.analyze_log_file(copy, incremental=True)
+        with open(path, "rb") as src, open(copy, "ab") as dst:
+            src.seek(cut)
+            shutil.copyfileobj(src, dst)
+
+    def run():
+        return log_service.analyze_log_file(copy, incremental=True)
+
+    run.prepare = prepare
+    run.scratch = scratch  # removed with the worker process
+    return run
+
+
+def _day04_analyzer(path):
+    analyzer = _load_module("day04_log_analyzer", "day-04/log_analyzer.py")
+    return lambda: analyzer.analyze_log_file(path)
+
+
+def _day05_analyzer(path):
+    analyzer = _load_module("day05_log_analyzer_oop", "day-05/log_analyzer_oop.py")
+    return lambda: analyzer.LogAnalyzer(path).analyze_logs()
+
+
+def _log_service_index(path):
+    from services.log_index import analyze_with_index, build_index
+    build_index(path)
+    return lambda: analyze_with_index(path)
+
+
+def _day06_cli(path):
+    cli = _load_module("day06_log_analyzer_cli", "day-06/log_analyzer_cli.py")
+
+    return lambda: cli.LogAnalyzer(path).analyze_logs()
+
+
+def _day09_logs(path):
+    app = _load_module("day09_main", "day-09/main.py")
+    app.LOG_FILE_PATH = path
+    from fastapi.testclient import TestClient
+    client = TestClient(app.app)
+    return lambda: client.get("/logs").json()
+
+
+ANALYZERS = {
+    "log_service.stream": _log_service(),
+    "log_service.mmap": _log_service(engine="mmap"),
+    "log_service.parallel": _log_service(workers=os.cpu_count() or 1),
+    "log_service.incremental.cold": _log_service_incremental_cold,
+    "log_service.incremental.resumed": _log_service_incremental_resumed,
+    "log_service.index": _log_service_index,
+    "day04.analyze_log_file": _day04_analyzer,
+    "day05.LogAnalyzer": _day05_analyzer,
+    "day06.LogAnalyzer": _day06_cli,
+    "day09./logs": _day09_logs,
+}
+
+
+def _reset_peak_rss() -> bool:
+    """Restart this process's peak RSS (VmHWM) from its current RSS; Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_since_reset() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def run_worker(name: str, path: str, iterations: int) -> dict:
+    """Time one analyzer in this process (invoked via --worker)."""
+    run = ANALYZERS[name](path)
+    prepare = getattr(run, "prepare", None)
+    latencies = []
+    timed_peak = 0
+    for _ in range(iterations):
+        if prepare is not None:
+            prepare()
+        # Setup (loading a copy, priming a checkpoint) must not count towards the peak
+        resettable = _reset_peak_rss()
+        started = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started)
+        if resettable:
+            timed_peak = max(timed_peak, _peak_rss_since_reset())
+
+    # Worker processes only show up in RUSAGE_CHILDREN once they have exited
+    from services.log_service import shutdown_workers
+    shutdown_workers()
+    # ru_maxrss is KiB on Linux, bytes on macOS; for children it is the largest single process
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "latencies": latencies,
+        "peak_rss_bytes": timed_peak or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children_peak_rss_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def benchmark(name: str, path: str, iterations: int, size: int, lines: int, env: dict) -> dict:
+    """Run one analyzer in a subprocess and summarise its timings."""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", name, "--file", path,
+         "--iterations", str(iterations)],
+        capture_output=True, text=True, cwd=PROJECT_DIR, env=env,
+    )
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+
+    raw = json.loads(proc.stdout.strip().splitlines()[-1])
+    latencies = raw["latencies"]
+    p50 = percentile(latencies, 50)
+    return {
+        "iterations": iterations,
+        "latency_s": {
+            "min": min(latencies),
+            "p50": p50,
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+            "mean": statistics.fmean(latencies),
+        },
+        "throughput_mb_s": size / (1 << 20) / p50,
+        "lines_per_s": lines / p50,
+        "peak_rss_mb": raw["peak_rss_bytes"] / (1 << 20),
+        "worker_peak_rss_mb": raw["children_peak_rss_bytes"] / (1 << 20),
+    }
+
+
+def count_lines(path: str) -> int:
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+def compare(current: dict, previous_path: str, threshold: float) -> None:
+    """Print the p50 change per analyzer against a previous results file."""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous_path} ({previous['generated_at']}):")
+    for name, result in current["results"].items():
+        before = previous["results"].get(name, {})
+        if "latency_s" not in result or "latency_s" not in before:
+            continue
+        change = result["latency_s"]["p50"] / before["latency_s"]["p50"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"  {name:<32} p50 {before['latency_s']['p50']:.3f}s -> {result['latency_s']['p50']:.3f}s "
+              f"({change:+.1%}){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the log analyzer implementations.")
+    parser.add_argument("--file", help="Existing log file to benchmark (default: generate one)")
+    parser.add_argument("--size", default="50MB", help="Size of the generated log, 1MB-10GB (default: 50MB)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated log (default: 42)")
+    parser.add_argument("--malformed", type=float, default=0.01, help="Malformed-line ratio of the generated log")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per analyzer (default: 5)")
+    parser.add_argument("--analyzers", default=",".join(ANALYZERS),
+                        help=f"Comma-separated subset of: {', '.join(ANALYZERS)}")
+    parser.add_argument("--out", help="Results JSON path (default: benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown flagged as regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.file, args.iterations)))
+        return
+
+    names = [name.strip() for name in args.analyzers.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ANALYZERS]
+    if unknown:
+        parser.error(f"Unknown analyzers: {', '.join(unknown)}")
+
+    path = args.file
+    if not path:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        path = os.path.join(DATA_DIR, f"synthetic-{args.size}-{args.seed}-{args.malformed}.log")
+        if not os.path.exists(path):
+            print(f"Generating {args.size} synthetic log at {path} ...")
+            generate_log(path, parse_size(args.size), seed=args.seed, malformed_ratio=args.malformed)
+
+    size = os.path.getsize(path)
+    lines = count_lines(path)
+    print(f"Benchmarking {path} ({size / (1 << 20):.1f} MB, {lines:,} lines), {args.iterations} runs each\n")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as index_dir:
+        # Sidecar indexes go to a scratch directory, not next to the log
+        env = dict(os.environ, LOG_INDEX_DIR=index_dir)
+        for name in names:
+            result = benchmark(name, path, args.iterations, size, lines, env)
+            results[name] = result
+            if "error" in result:
+                print(f"  {name:<32} failed: {result['error']}")
+                continue
+            latency = result["latency_s"]
+            workers = f" (largest worker {result['worker_peak_rss_mb']:.0f} MB)" if result["worker_peak_rss_mb"] else ""
+            print(f"  {name:<32} p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  "
+                  f"p99 {latency['p99']:.3f}s  {result['throughput_mb_s']:8.1f} MB/s  "
+                  f"{result['lines_per_s']:12,.0f} lines/s  peak RSS {result['peak_rss_mb']:.0f} MB{workers}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "file": {"path": os.path.abspath(path), "size_bytes": size, "lines": lines},
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {out}")
+
+    if args.compare:
+        compare(report, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,168 @@
+import hashlib
+import json
 import os
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
-from services.log_service import analyze_log_file
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+from services.log_service import (
+    AUTO_FORMAT,
+    LOG_LEVELS,
+    STANDARD_FORMAT,
+    LogStats,
+    LogStreamParser,
+    analyze_log_file,
+    analyze_log_files,
+    expand_log_paths,
+    file_compression,
+    validate_analyze_options,
+)
+from services.log_index import analyze_with_index, build_index
+from services.log_columns import log_timeline
+from services.log_entries import ENTRIES_PAGE, MAX_ENTRIES_PAGE, cached_entries
+from services.log_follow import LogFollower
 
 router = APIRouter()
 
 # Default sample log location (relative to project root when running main.py)
 DEFAULT_LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "app.log")
 
+# Live stream: most new ERROR lines sent per update event
+STREAM_ERROR_LIMIT = 100
+
+# /logs/analyze result cache: entries kept (LRU) and seconds an entry stays fresh
+RESULT_CACHE_SIZE = 128
+RESULT_CACHE_TTL = 30.0
+
+# The upload endpoint reads the raw request stream, so its form is documented by hand
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "Upload a .log file for analysis (optionally gzip/bz2/xz/zstd compressed)",
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache of analysis results, keyed by file identity.
+
+    Keys include the file's real path, size and mtime_ns, so a file that
+    changed simply misses. Concurrent misses on the same key are coalesced:
+    one caller computes while the others wait for its result.
+    """
+
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.not_modified = 0
+        self._entries: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+        self._pending: dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], dict]) -> dict:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if time.monotonic() - entry[0] < self.ttl:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return entry[1]
+                    del self._entries[key]
+                    self.expirations += 1
+                waiting = self._pending.get(key)
+                if waiting is None:
+                    self.misses += 1
+                    self._pending[key] = threading.Event()
+                    break
+            # Another request is computing this key; take its result (or retry if it failed)
+            waiting.wait()
+
+        try:
+            result = compute()
+            with self._lock:
+                self._entries[key] = (time.monotonic(), result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return result
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "not_modified": self.not_modified,
+            }
+
+
+result_cache = ResultCache()
+
+
+def _result_key(path: str, *options) -> tuple:
+    """Cache key of an analysis: the file's identity plus the options that shape the result."""
+    real_path = os.path.realpath(path)
+    st = os.stat(real_path)
+    return (real_path, st.st_size, st.st_mtime_ns) + options
+
+
+def _etag(key: tuple) -> str:
+    return '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 
 @router.get("/analyze", status_code=200)
 def analyze_log(
+    request: Request,
     log_path: str = Query(
         default=None,
         description="Absolute path to the log file on the server. "
@@ -19,21 +172,334 @@ def analyze_log(
         default=None,
         description="Optional log level filter: INFO | WARNING | ERROR | DEBUG | CRITICAL"
     ),
+    engine: str = Query(
+        default="stream",
+        description="Parsing engine: stream | mmap (memory-mapped bytes scan, fastest on large files)"
+    ),
+    workers: int = Query(
+        default=1, ge=1, le=64,
+        description="Worker processes for chunked parallel analysis (capped at the CPU count)"
+    ),
+    incremental: bool = Query(
+        default=False,
+        description="Reuse the last checkpoint of this file and parse only newly appended bytes"
+    ),
+    use_index: bool = Query(
+        default=False,
+        description="Answer from the file's sidecar index (built or extended on demand)"
+    ),
+    start: str = Query(
+        default=None,
+        description="Only analyze lines at or after this time, e.g. 2025-01-10 09:00:00"
+    ),
+    end: str = Query(
+        default=None,
+        description="Only analyze lines at or before this time, e.g. 2025-01-10 09:15:00"
+    ),
+    templates: int = Query(
+        default=0, ge=0, le=100,
+        description="Report this many top recurring message templates per level (0 = off)"
+    ),
+    log_format: str = Query(
+        default="auto",
+        description="Line format: auto | standard | json | syslog (RFC 5424) | access (nginx/Apache)"
+    ),
 ):
     """
     Analyze a log file on the server and return a structured summary.
 
     - **log_path**: Path to the log file (server-side). Leave blank to use the bundled sample.
     - **filter_level**: Return only the count for a specific log level.
+    - **engine**: `stream` (line by line) or `mmap` (raw bytes scan for very large files).
+    - **workers**: Split the file across this many processes (default 1).
+    - **incremental**: For files that only grow — repeat calls parse only the appended bytes.
+      Rotation or truncation triggers a full rescan.
+    - **use_index**: Answer from the sidecar index (see `POST /logs/index`) instead of rescanning.
+    - **start** / **end**: Restrict the analysis to a time window. The window is found by
+      binary search (the log must be in time order), so only its lines are read.
+    - **templates**: Cluster messages into templates (e.g. `Timeout connecting to <*>`) in the
+      same pass and return the top N per level with counts and first/last seen.
+      Not available with `incremental` or `use_index`.
+    - **log_format**: `auto` (default) detects the format from the first lines; JSON lines,
+      RFC 5424 syslog and nginx/Apache access logs are parsed natively. Time windows and
+      the index need the standard format.
+
+    Results are cached per file identity (path, size, mtime) and options, and
+    carry an `ETag`: send it back in `If-None-Match` to get `304 Not Modified`
+    while the file is unchanged. Cache counters are at `GET /logs/cache`.
+
+    Returns counts per log level, overall health status, the 5 most recent
+    errors and warnings, and `error_bursts`: windows where the ERROR/CRITICAL
+    rate spiked above its baseline, with start/end and peak rate.
+    """
+    path = log_path or os.path.abspath(DEFAULT_LOG_PATH)
+
+    try:
+        if use_index and templates:
+            raise ValueError("Template mining needs a full scan and cannot use the index.")
+        if use_index and log_format not in (AUTO_FORMAT, STANDARD_FORMAT):
+            raise ValueError("The index only supports the standard log format.")
+        validate_analyze_options(engine, workers, incremental, templates, log_format)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Log file not found: {path}")
+
+        # Engine, workers, incremental and use_index change the cost, not the result
+        key = _result_key(path, filter_level.upper() if filter_level else None, start, end, templates, log_format)
+        etag = _etag(key)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            result_cache.record_not_modified()
+            return Response(status_code=304, headers=headers)
+
+        def compute() -> dict:
+            if use_index and not (start or end):
+                return analyze_with_index(path, filter_level=filter_level)
+            return analyze_log_file(
+                path,
+                filter_level=filter_level,
+                engine=engine,
+                workers=workers,
+                incremental=incremental,
+                start=start,
+                end=end,
+                templates=templates,
+                log_format=log_format,
+            )
+
+        return JSONResponse(result_cache.get_or_compute(key, compute), headers=headers)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.get("/cache", status_code=200)
+def result_cache_stats():
+    """
+    Counters of the `/logs/analyze` result cache: size, hits, misses, hit ratio,
+    LRU evictions, TTL expirations and `304 Not Modified` answers.
+    """
+    return result_cache.stats()
+
+
+class BatchAnalyzeRequest(BaseModel):
+    paths: list[str] = Field(default_factory=list, description="Log file paths on the server")
+    glob: Optional[str] = Field(default=None, description="Glob pattern, e.g. /var/log/*/*.log (** is recursive)")
+    filter_level: Optional[str] = Field(
+        default=None, description="Optional log level filter: INFO | WARNING | ERROR | DEBUG | CRITICAL"
+    )
+    workers: int = Field(default=4, ge=1, le=64, description="Maximum files analyzed concurrently")
+
+
+@router.post("/analyze/batch", status_code=200)
+def analyze_log_batch(body: BatchAnalyzeRequest):
+    """
+    Analyze many log files at once in the server's shared pool of worker processes.
+
+    - **paths** / **glob**: Files to analyze; both may be combined (duplicates are dropped).
+    - **filter_level**: Per-file results only report the count for that level.
+    - **workers**: Maximum number of files analyzed concurrently. All requests share
+      one pool of `LOG_WORKER_PROCESSES` processes (default: the CPU count).
+
+    Returns per-file summaries plus a merged `fleet` summary whose health status
+    is the worst of the files. Missing, empty or corrupt files are reported
+    inline with an `error` and do not fail the batch.
+    """
+    try:
+        paths = expand_log_paths(body.paths, body.glob)
+        return analyze_log_files(paths, filter_level=body.filter_level, workers=body.workers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.post("/index", status_code=200)
+def index_log(
+    log_path: str = Query(
+        default=None,
+        description="Absolute path to the log file on the server. "
+                    "Defaults to the bundled app.log sample."
+    ),
+):
+    """
+    Build or refresh the sidecar index of a log file.
+
+    The index (`<log>.idx`, or under `LOG_INDEX_DIR` when set) stores per-level
+    line offsets, per-minute error counts and the first/last timestamps, so
+    `/logs/analyze?use_index=true` can answer in milliseconds. Growing files
+    are extended incrementally; rotated or truncated files are re-indexed.
+    """
+    path = log_path or os.path.abspath(DEFAULT_LOG_PATH)
+
+    try:
+        header = build_index(path)
+        return {
+            "log_file": os.path.basename(path),
+            "indexed_bytes": header["offset"],
+            "total_lines": header["total_lines"],
+            "unknown_lines": header["unknown_lines"],
+            "counts": header["counts"],
+            "first_timestamp": header["first_timestamp"],
+            "last_timestamp": header["last_timestamp"],
+            "minutes_indexed": header["minutes"],
+        }
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.get("/timeline", status_code=200)
+def log_timeline_view(
+    log_path: str = Query(
+        default=None,
+        description="Absolute path to the log file on the server. "
+                    "Defaults to the bundled app.log sample."
+    ),
+    bucket: str = Query(
+        default="1m",
+        description="Bucket width: 30s | 1m | 15m | 1h | 1d (or plain seconds)"
+    ),
+    start: str = Query(
+        default=None,
+        description="Only count lines at or after this time, e.g. 2025-01-10 09:00:00"
+    ),
+    end: str = Query(
+        default=None,
+        description="Only count lines at or before this time, e.g. 2025-01-10 09:15:00"
+    ),
+    top: int = Query(
+        default=5, ge=0, le=100,
+        description="Number of buckets with the most errors to report"
+    ),
+):
+    """
+    Per-interval line counts by level, for dashboards.
+
+    - **bucket**: Width of each interval. Buckets are aligned to multiples of it
+      and returned densely (empty intervals included).
+    - **start** / **end**: Restrict the timeline to a time window.
+    - **top**: How many of the buckets with the most errors (ERROR + CRITICAL) to list.
+
+    The log is parsed into columnar NumPy arrays (epoch seconds, level code,
+    message offset/length), so histograms and ratios are vectorized.
+    """
+    path = log_path or os.path.abspath(DEFAULT_LOG_PATH)
+
+    try:
+        return log_timeline(path, bucket=bucket, start=start, end=end, top=top)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.get("/entries", status_code=200)
+def list_log_entries(
+    log_path: str = Query(
+        default=None,
+        description="Absolute path to the log file on the server. "
+                    "Defaults to the bundled app.log sample."
+    ),
+    level: str = Query(
+        default=None,
+        description="Optional log level filter: INFO | WARNING | ERROR | DEBUG | CRITICAL"
+    ),
+    start: str = Query(
+        default=None,
+        description="Only list lines at or after this time, e.g. 2025-01-10 09:00:00"
+    ),
+    end: str = Query(
+        default=None,
+        description="Only list lines at or before this time, e.g. 2025-01-10 09:15:00"
+    ),
+    offset: int = Query(default=0, ge=0, description="Matching entries to skip"),
+    limit: int = Query(
+        default=ENTRIES_PAGE, ge=1, le=MAX_ENTRIES_PAGE,
+        description="Entries to return"
+    ),
+):
+    """
+    Page through the parsed entries of a log, oldest first.
+
+    - **level**: Only entries of that level.
+    - **start** / **end**: Only entries inside that time window (the log must be in time order).
+    - **offset** / **limit**: The page to return.
+
+    The file is parsed once into a compact array-backed store that is then only
+    extended with appended lines, so paging through millions of entries does
+    not reparse the log; only the returned messages are read and decoded.
+    Logs whose store would exceed `ENTRIES_CACHE_BYTES` are refused (400).
+    """
+    path = log_path or os.path.abspath(DEFAULT_LOG_PATH)
+
+    try:
+        level = level.upper() if level else None
+        if level and level not in LOG_LEVELS:
+            raise ValueError(f"Unknown level '{level}'. Expected one of: {', '.join(LOG_LEVELS)}")
+        entries = cached_entries(path)
+        rows = entries.select(level, start, end)
+        return {
+            "log_file": os.path.basename(path),
+            "total_matched": len(rows),
+            "offset": offset,
+            "limit": limit,
+            "entries": [entry.to_dict() for entry in entries.read(rows[offset:offset + limit])],
+        }
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
 
-    Returns counts per log level, overall health status, and the 5 most recent
-    errors and warnings.
+@router.get("/stream", status_code=200)
+def stream_log(
+    request: Request,
+    log_path: str = Query(
+        default=None,
+        description="Absolute path to the log file on the server. "
+                    "Defaults to the bundled app.log sample."
+    ),
+    from_start: bool = Query(
+        default=True,
+        description="Count the existing content first; false starts at the end of the file"
+    ),
+    heartbeat: float = Query(
+        default=15, ge=1, le=300,
+        description="Seconds between keep-alive comments while the log is idle"
+    ),
+):
+    """
+    Follow a log file live as Server-Sent Events (`text/event-stream`).
+
+    - **log_path**: Path to the log file (server-side). Leave blank to use the bundled sample.
+    - **from_start**: Analyze the existing content before following (default), or only new lines.
+    - **heartbeat**: Keep-alive interval while nothing is written.
+
+    The first `snapshot` event carries the usual analysis summary. Each
+    `update` event then carries the new line count, per-level count deltas and
+    totals, and the new ERROR lines. Only appended bytes are parsed;
+    rotated and truncated files are followed like `tail -F`, and an idle log
+    costs no CPU (inotify on Linux, a slow stat() poll elsewhere) and holds no
+    worker thread.
     """
     path = log_path or os.path.abspath(DEFAULT_LOG_PATH)
 
     try:
-        result = analyze_log_file(path, filter_level=filter_level)
-        return result
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Log file not found: {path}")
+        if file_compression(path):
+            raise ValueError("Compressed logs cannot be followed.")
+        follower = LogFollower(path, from_start=from_start)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
@@ -41,45 +507,160 @@ def analyze_log(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+    return StreamingResponse(
+        _follow_events(request, follower, heartbeat),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@router.post("/analyze/upload", status_code=200)
+
+async def _follow_events(request: Request, follower: LogFollower, heartbeat: float):
+    """Yield the SSE frames of /logs/stream until the client disconnects."""
+    name = os.path.basename(follower.log_path)
+    try:
+        stats = LogStats(log_format=AUTO_FORMAT)
+        await run_in_threadpool(stats.add_lines, follower.read_lines())
+        yield _sse("snapshot", stats.summary(name))
+
+        while not await request.is_disconnected():
+            if not await follower.wait_async(heartbeat):
+                yield ": keep-alive\n\n"
+                continue
+
+            rotations, truncations = follower.rotations, follower.truncations
+            delta = LogStats(log_format=stats.log_format)
+            delta.recent_errors = deque(maxlen=STREAM_ERROR_LIMIT)
+            await run_in_threadpool(delta.add_lines, follower.read_lines())
+            if not delta.total_lines and rotations == follower.rotations and truncations == follower.truncations:
+                continue
+            stats.merge(delta)
+            yield _sse("update", {
+                "log_file": name,
+                "new_lines": delta.total_lines,
+                "counts_delta": {level: delta.counts[level] for level in delta.counts},
+                "total_lines": stats.total_lines,
+                "counts": {level: stats.counts.get(level, 0) for level in LOG_LEVELS},
+                "new_errors": [entry.to_dict() for entry in delta.recent_errors],
+                "rotated": follower.rotations > rotations,
+                "truncated": follower.truncations > truncations,
+            })
+    finally:
+        follower.close()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/analyze/upload", status_code=200, openapi_extra=UPLOAD_REQUEST_BODY)
 async def analyze_uploaded_log(
-    file: UploadFile = File(..., description="Upload a .log file for analysis"),
+    request: Request,
     filter_level: str = Query(
         default=None,
         description="Optional log level filter: INFO | WARNING | ERROR | DEBUG | CRITICAL"
     ),
+    templates: int = Query(
+        default=0, ge=0, le=100,
+        description="Report this many top recurring message templates per level (0 = off)"
+    ),
+    log_format: str = Query(
+        default="auto",
+        description="Line format: auto | standard | json | syslog (RFC 5424) | access (nginx/Apache)"
+    ),
 ):
     """
     Upload a `.log` file and receive an instant analysis.
 
-    - **file**: The log file to upload (`.log` or `.txt`).
+    - **file**: The log file to upload (`.log` or `.txt`) as multipart form field `file`.
+      A raw request body (e.g. `application/octet-stream`) is accepted too.
+      Compressed uploads (`.gz`, `.bz2`, `.xz`, `.zst`) are detected by their
+      magic bytes and decompressed while streaming.
     - **filter_level**: Optional — return only the count for a specific level.
+    - **templates**: Optional — top N recurring message templates per level.
+    - **log_format**: Optional — line format; detected from the first lines by default.
+
+    The upload is parsed chunk by chunk as it arrives: nothing is written to
+    disk and memory use does not grow with the size of the file.
     """
-    # Save to a temp file
-    import tempfile
     try:
-        contents = await file.read()
-        if not contents:
+        filename, stats = await _stream_upload(request, templates, log_format)
+        if not stats.total_lines:
             raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".log", mode="wb") as tmp:
-            tmp.write(contents)
-            tmp_path = tmp.name
-
-        result = analyze_log_file(tmp_path, filter_level=filter_level)
-        # Override log_file name with the original filename
-        result["log_file"] = file.filename
-        return result
+        return stats.summary(filename, filter_level)
     except HTTPException:
         raise
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except ValueError as e:
+    except (ValueError, MultipartParseError) as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
-    finally:
-        # Clean up temp file
-        if "tmp_path" in locals() and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+
+
+async def _stream_upload(
+    request: Request, templates: int = 0, log_format: str = AUTO_FORMAT
+) -> tuple[str, LogStats]:
+    """
+    Feed the request body into a LogStreamParser as it arrives.
+
+    Multipart bodies are parsed incrementally and only the data of the `file`
+    part is fed through; any other body is treated as the raw log.
+    """
+    parser = LogStreamParser(templates, log_format)
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+
+    if content_type != b"multipart/form-data":
+        async for chunk in request.stream():
+            if chunk:
+                await run_in_threadpool(parser.feed, chunk)
+        return "upload.log", await run_in_threadpool(parser.close)
+
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("Multipart upload is missing its boundary.")
+
+    part = {"field": b"", "value": b"", "disposition": b"", "is_file": False, "filename": None}
+    pending: list[bytes] = []
+
+    def on_part_begin():
+        part.update(field=b"", value=b"", disposition=b"", is_file=False)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        if part["field"].lower() == b"content-disposition":
+            part["disposition"] = part["value"]
+        part.update(field=b"", value=b"")
+
+    def on_headers_finished():
+        _, params = parse_options_header(part["disposition"])
+        if params.get(b"name") == b"file" and part["filename"] is None:
+            part["is_file"] = True
+            part["filename"] = params.get(b"filename", b"upload.log").decode("utf-8", "replace")
+
+    def on_part_data(data, start, end):
+        if part["is_file"]:
+            pending.append(data[start:end])
+
+    multipart = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    async for chunk in request.stream():
+        multipart.write(chunk)
+        if pending:
+            data = b"".join(pending)
+            pending.clear()
+            await run_in_threadpool(parser.feed, data)
+    multipart.finalize()
+
+    if part["filename"] is None:
+        raise ValueError("Multipart upload has no 'file' field.")
+    return part["filename"], await run_in_threadpool(parser.close)
@@ -1,19 +1,86 @@
 from fastapi import APIRouter, HTTPException, Query
-from services.metrics_service import get_system_metrics
+from services.metrics_service import (
+    IO_WINDOW,
+    MAX_IO_WINDOW,
+    MAX_PROCESS_TOP,
+    get_metrics_history,
+    get_system_metrics,
+    get_top_processes,
+)
 
 router = APIRouter()
 
 
 @router.get("/metrics", status_code=200)
-def get_metrics(cpu_threshold: int = Query(default=80, ge=1, le=100, description="CPU % alert threshold (1-100)")):
+async def get_metrics(
+    cpu_threshold: int = Query(default=80, ge=1, le=100, description="CPU % alert threshold (1-100)"),
+    io_window: int = Query(
+        default=IO_WINDOW, ge=1, le=MAX_IO_WINDOW,
+        description=f"Seconds over which per-interface and per-disk I/O rates are averaged (1-{MAX_IO_WINDOW})"
+    ),
+):
     """
     Returns live system metrics: CPU, Memory, Disk, Network I/O, and overall health status.
 
+    Metrics come from the latest background sample (taken every second by default),
+    so the call never waits; `sample_age_seconds` tells how old the sample is.
+    Throughput and IOPS per network interface and per disk are averaged from the
+    counter deltas between samples.
+
     - **cpu_threshold**: Percentage above which system status becomes 'High CPU' (default: 80)
+    - **io_window**: Averaging window of the I/O rates in seconds (default: 10)
     """
     try:
-        metrics = get_system_metrics(cpu_threshold=cpu_threshold)
+        metrics = get_system_metrics(cpu_threshold=cpu_threshold, io_window=io_window)
         return metrics
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal Server Error: {str(e)}"
+        )
+
+
+@router.get("/metrics/history", status_code=200)
+def get_history(
+    window: int = Query(default=300, ge=1, description="Seconds of history to return, ending now"),
+    step: int = Query(default=10, ge=1, description="Seconds summarised by each point (min/avg/max)"),
+):
+    """
+    Returns the sampled metrics of the last **window** seconds, downsampled to one
+    point per **step** seconds with the min, avg and max of CPU, memory, swap and
+    disk usage and of the network send/receive rates.
+
+    History is kept in a fixed-size ring (an hour at the default sample interval).
+    """
+    try:
+        return get_metrics_history(window=window, step=step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal Server Error: {str(e)}"
+        )
+
+
+@router.get("/processes", status_code=200)
+def get_processes(
+    top: int = Query(default=10, ge=1, le=MAX_PROCESS_TOP, description=f"Processes to return (1-{MAX_PROCESS_TOP})"),
+    sort: str = Query(default="cpu", description="Sort by: cpu | rss"),
+):
+    """
+    Returns the **top** processes by CPU usage or resident memory (**sort**), to find
+    what is behind a 'High CPU' or memory alert.
+
+    CPU usage is measured since the previous call (`cpu_interval_seconds`), in % of one
+    core; on the first call each process reports its average since it started.
+    """
+    try:
+        return get_top_processes(top=top, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
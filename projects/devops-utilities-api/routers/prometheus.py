@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from services.prometheus_service import PROMETHEUS_CONTENT_TYPE, render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", status_code=200, response_class=Response)
+def prometheus_metrics():
+    """
+    Returns system gauges, log lines per level and API request stats in the
+    Prometheus text exposition format, for scraping.
+
+    The payload is rendered once per background metrics sample, so scrapes are cheap.
+    """
+    try:
+        return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal Server Error: {str(e)}"
+        )
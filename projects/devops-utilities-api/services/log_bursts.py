@@ -0,0 +1,204 @@
+from collections import deque
+from typing import Iterable, Optional
+
+
+# Defaults of the error-burst detector: a burst is a sliding window whose
+# ERROR/CRITICAL rate is over BURST_FACTOR times the baseline and that holds at
+# least BURST_MIN_ERRORS errors. The baseline is an EWMA of the per-minute
+# error count of the minutes that already left the window
+BURST_WINDOW_MINUTES = 5
+BURST_FACTOR = 3.0
+BURST_MIN_ERRORS = 10
+BURST_BASELINE_ALPHA = 0.05
+# Bursts kept per report (the ones with the highest peak rate)
+BURST_LIMIT = 10
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 of a proleptic Gregorian date; works on ints and int64 arrays alike."""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + 12 * (month <= 2) - 3) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def civil_from_days(days: int) -> tuple[int, int, int]:
+    """Inverse of days_from_civil()."""
+    days += 719468
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    return year_of_era + era * 400 + (month <= 2), month, day
+
+
+def minute_index(timestamp) -> int:
+    """Minutes since the epoch of a `YYYY-MM-DD HH:MM` timestamp prefix (str or bytes)."""
+    days = days_from_civil(int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]))
+    return days * 1440 + int(timestamp[11:13]) * 60 + int(timestamp[14:16])
+
+
+def format_minute(index: int, second: int = 0) -> str:
+    """Render a minute index as `YYYY-MM-DD HH:MM:SS`."""
+    days, minute = divmod(index, 1440)
+    year, month, day = civil_from_days(days)
+    return f"{year:04d}-{month:02d}-{day:02d} {minute // 60:02d}:{minute % 60:02d}:{second:02d}"
+
+
+class BurstDetector:
+    """
+    Streaming detector of error bursts over per-minute ERROR/CRITICAL counts.
+
+    Feed minutes in time order with add(); state is a window of
+    `window` minutes, the EWMA baseline, the open burst and at most `limit`
+    finished bursts, so memory does not grow with the log. Minutes without
+    errors need not be fed; gaps count as zero. A minute older than the
+    current one is folded into the current minute. The first `window`
+    minutes only seed the baseline.
+    """
+
+    __slots__ = ("window", "factor", "min_errors", "alpha", "limit", "baseline", "bursts_total",
+                 "_bursts", "_recent", "_sum", "_samples", "_minute", "_current", "_open")
+
+    def __init__(
+        self,
+        window: int = BURST_WINDOW_MINUTES,
+        factor: float = BURST_FACTOR,
+        min_errors: int = BURST_MIN_ERRORS,
+        alpha: float = BURST_BASELINE_ALPHA,
+        limit: int = BURST_LIMIT,
+    ):
+        if window < 1:
+            raise ValueError("Burst window must be at least 1 minute.")
+        self.window = window
+        self.factor = factor
+        self.min_errors = min_errors
+        self.alpha = alpha
+        self.limit = limit
+        self.baseline: Optional[float] = None
+        self.bursts_total = 0
+        self._bursts: list[dict] = []
+        self._recent: deque = deque()
+        self._sum = 0
+        self._samples = 0
+        self._minute: Optional[int] = None
+        self._current = 0
+        self._open: Optional[dict] = None
+
+    def add(self, minute: int, errors: int) -> None:
+        """Count `errors` ERROR/CRITICAL lines in the minute `minute` (see minute_index())."""
+        if self._minute is None:
+            self._minute, self._current = minute, errors
+            return
+        if minute <= self._minute:
+            self._current += errors
+            return
+
+        self._close_minute(self._minute, self._current)
+        gap = minute - self._minute - 1
+        # Once the window is all zeros nothing changes but the baseline decay
+        for skipped in range(self._minute + 1, self._minute + 1 + min(gap, self.window)):
+            self._close_minute(skipped, 0)
+        if gap > self.window:
+            self.baseline *= (1 - self.alpha) ** (gap - self.window)
+        self._minute, self._current = minute, errors
+
+    def close(self) -> list[dict]:
+        """Flush the last minute and return the bursts found, in time order."""
+        if self._minute is not None:
+            self._close_minute(self._minute, self._current)
+            self._minute = None
+        self._finish()
+        return sorted(self._bursts, key=lambda burst: burst["start"])
+
+    def _close_minute(self, minute: int, errors: int) -> None:
+        recent = self._recent
+        recent.append((minute, errors))
+        self._sum += errors
+        if len(recent) <= self.window:
+            return
+        evicted = recent.popleft()[1]
+        self._sum -= evicted
+        # Running mean until 1/alpha minutes were seen, so an early storm does not skew the seed
+        self._samples += 1
+        weight = max(self.alpha, 1 / self._samples)
+        self.baseline = evicted if self.baseline is None else self.baseline + weight * (evicted - self.baseline)
+
+        rate = self._sum / self.window
+        if self._sum < self.min_errors or rate <= self.factor * self.baseline:
+            self._finish()
+            return
+
+        # A burst spans the minutes that are hot on their own, first to last
+        hot = self.factor * self.baseline
+        burst = self._open
+        if burst is None:
+            minutes = list(recent)
+            first = next((i for i, (_, n) in enumerate(minutes) if n > hot), None)
+            if first is None:
+                first = next(i for i, (_, n) in enumerate(minutes) if n)
+            minutes = minutes[first:]
+            last = max(i for i, (_, n) in enumerate(minutes) if n)
+            self._open = {
+                "start": minutes[0][0],
+                "end": minutes[last][0],
+                "errors": sum(n for _, n in minutes[:last + 1]),
+                "pending": 0,
+                "peak": max(n for _, n in minutes),
+                "peak_window": rate,
+                "baseline": self.baseline,
+            }
+            return
+
+        burst["pending"] += errors
+        burst["peak"] = max(burst["peak"], errors)
+        burst["peak_window"] = max(burst["peak_window"], rate)
+        if errors > hot:
+            burst["end"] = minute
+            burst["errors"] += burst["pending"]
+            burst["pending"] = 0
+
+    def _finish(self) -> None:
+        burst = self._open
+        if burst is None:
+            return
+        self._open = None
+        self.bursts_total += 1
+        report = {
+            "start": format_minute(burst["start"]),
+            "end": format_minute(burst["end"], 59),
+            "duration_minutes": burst["end"] - burst["start"] + 1,
+            "errors": burst["errors"],
+            "peak_rate_per_minute": burst["peak"],
+            "peak_window_rate_per_minute": round(burst["peak_window"], 2),
+            "baseline_rate_per_minute": round(burst["baseline"], 2),
+        }
+        self._bursts.append(report)
+        if len(self._bursts) > self.limit:
+            self._bursts.remove(min(self._bursts, key=lambda b: b["peak_rate_per_minute"]))
+
+
+def detect_bursts(series: Iterable[tuple[int, int]], **options) -> dict:
+    """
+    Run a BurstDetector over (minute index, error count) pairs.
+
+    Returns:
+        dict: The detector settings, the number of bursts found and the
+        (at most BURST_LIMIT) strongest bursts in time order.
+    """
+    detector = BurstDetector(**options)
+    for minute, errors in series:
+        detector.add(minute, errors)
+    bursts = detector.close()
+    return {
+        "window_minutes": detector.window,
+        "factor": detector.factor,
+        "min_errors": detector.min_errors,
+        "bursts_total": detector.bursts_total,
+        "bursts": bursts,
+    }
@@ -0,0 +1,344 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Sequence
+
+from services.log_bursts import format_minute, minute_index
+from services.log_service import (
+    CHECKPOINT_HEAD_BYTES,
+    LOG_LEVELS,
+    LOG_LINE_BYTES,
+    LogEntry,
+    file_compression,
+    line_boundary,
+    parse_time_bound,
+    require_standard_format,
+    seek_timestamp,
+)
+
+
+# Entries returned per page by default, and the most a page may hold
+ENTRIES_PAGE = 100
+MAX_ENTRIES_PAGE = 10000
+
+# Bytes handed to finditer() per step while loading a store
+ENTRIES_CHUNK = 1 << 20
+
+# Whole-file stores kept for repeat queries (LRU), keyed by real path, and the
+# most memory they may hold together; a log whose store alone would need more is refused
+ENTRIES_CACHE_LIMIT = 4
+ENTRIES_CACHE_BYTES = 256 << 20
+
+_LEVEL_CODES = {level: code for code, level in enumerate(LOG_LEVELS)}
+_LEVEL_CODES_BYTES = {level.encode(): code for code, level in enumerate(LOG_LEVELS)}
+
+
+def _seconds(timestamp) -> int:
+    """Epoch seconds of a `YYYY-MM-DD HH:MM:SS` timestamp (str or bytes)."""
+    return minute_index(timestamp) * 60 + int(timestamp[17:19])
+
+
+class LogEntries:
+    """
+    Append-only, array-backed index of the parsed entries of one log file.
+
+    Each entry costs 21 bytes of bookkeeping (epoch seconds, level code and
+    the file offset and length of its message) plus 8 bytes in the row list
+    of its level. Messages stay in the file and are read with pread() only
+    for the rows asked for, so the store is a small fraction of the log's
+    size. Entries are materialised as LogEntry objects only when read.
+
+    A store may grow while it is being read: select() only returns rows that
+    existed when it was called, and read() skips rows dropped in the meantime
+    by truncate().
+    """
+
+    __slots__ = ("log_path", "_timestamps", "_levels", "_offsets", "_lengths", "_level_rows")
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self._timestamps = array("q")
+        self._levels = array("B")
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        # Rows of each level, in log order, so a level filter is a slice
+        self._level_rows = [array("Q") for _ in LOG_LEVELS]
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def __getitem__(self, row: int) -> LogEntry:
+        if row < 0:
+            row += len(self)
+        return self.read((row,))[0]
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        for first in range(0, len(self), ENTRIES_PAGE):
+            yield from self.read(range(first, min(first + ENTRIES_PAGE, len(self))))
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store."""
+        columns = (self._timestamps, self._levels, self._offsets, self._lengths, *self._level_rows)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def read(self, rows: Iterable[int]) -> list[LogEntry]:
+        """The entries of `rows`, with their messages read from the log file."""
+        timestamps, levels, offsets, lengths = self._timestamps, self._levels, self._offsets, self._lengths
+        entries = []
+        with open(self.log_path, "rb") as f:
+            fd = f.fileno()
+            for row in rows:
+                if row >= len(lengths):
+                    continue
+                seconds = timestamps[row]
+                entries.append(LogEntry(
+                    format_minute(seconds // 60, seconds % 60),
+                    LOG_LEVELS[levels[row]],
+                    os.pread(fd, lengths[row], offsets[row]),
+                ))
+        return entries
+
+    def extend_from_buffer(
+        self, buf, start: int, end: int, level: Optional[str] = None, max_bytes: Optional[int] = None
+    ) -> None:
+        """
+        Add the recognised lines of buf[start:end] (line-aligned `start`).
+
+        `buf` must hold the store's log file from offset 0 (typically its
+        mmap): only the offset and length of each message are recorded, and
+        nothing is decoded. With `level` only lines of that level are kept.
+
+        Raises:
+            ValueError: If the store grows past `max_bytes`.
+        """
+        wanted = level.encode() if level else None
+        timestamps, levels, offsets, lengths = self._timestamps, self._levels, self._offsets, self._lengths
+        level_rows = self._level_rows
+        pos = start
+        while pos < end:
+            chunk_end = line_boundary(buf, pos + ENTRIES_CHUNK, end)
+            for match in LOG_LINE_BYTES.finditer(buf, pos, chunk_end):
+                found = match.group("level")
+                if found is None or (wanted is not None and found != wanted):
+                    continue
+                code = _LEVEL_CODES_BYTES[found]
+                message = buf[match.end("level"):match.end()].lstrip()
+                level_rows[code].append(len(timestamps))
+                timestamps.append(_seconds(match.group("timestamp")))
+                levels.append(code)
+                offsets.append(match.end() - len(message))
+                lengths.append(len(message.rstrip()))
+            pos = chunk_end
+            if max_bytes is not None and self.nbytes > max_bytes:
+                raise ValueError(
+                    f"Log has too many entries to page through (over {max_bytes >> 20} MB of index); "
+                    "use /logs/analyze or /logs/stream instead."
+                )
+
+    def truncate(self, length: int) -> None:
+        """Drop the rows from `length` on."""
+        for rows in self._level_rows:
+            del rows[bisect_left(rows, length):]
+        for column in (self._lengths, self._offsets, self._levels, self._timestamps):
+            del column[length:]
+
+    def select(
+        self,
+        level: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Sequence[int]:
+        """
+        Rows stamped within [start, end] and of `level` (all optional), in log order.
+
+        The store must be in time order (as logs are). The window is located
+        by binary search, in the rows of `level` when given, so the result is
+        a range or a zero-copy view: slicing a page out of it costs nothing
+        however many rows match.
+
+        Raises:
+            ValueError: If a bound is malformed or start is after end.
+        """
+        start_bound = parse_time_bound(start) if start else None
+        end_bound = parse_time_bound(end) if end else None
+        if start_bound and end_bound and start_bound > end_bound:
+            raise ValueError("start must not be after end.")
+        # Rows are appended level row first, so the timestamps bound what is complete
+        size = len(self._timestamps)
+        low = bisect_left(self._timestamps, _seconds(start_bound), 0, size) if start_bound else 0
+        high = bisect_right(self._timestamps, _seconds(end_bound), 0, size) if end_bound else size
+        if level is None:
+            return range(low, max(low, high))
+        rows = self._level_rows[_LEVEL_CODES[level]]
+        first, last = bisect_left(rows, low), bisect_left(rows, high)
+        return _RowSlice(rows, first, max(first, last))
+
+
+class _RowSlice(Sequence):
+    """
+    rows[first:last] of a level's row list without copying it; slicing it
+    copies only the slice. Unlike a memoryview it does not pin the array, so
+    the store can keep growing.
+    """
+
+    __slots__ = ("_rows", "_range")
+
+    def __init__(self, rows: array, first: int, last: int):
+        self._rows = rows
+        self._range = range(first, last)
+
+    def __len__(self) -> int:
+        return len(self._range)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            window = self._range[index]
+            return self._rows[window.start:window.stop:window.step]
+        return self._rows[self._range[index]]
+
+
+def _check_loadable(log_path: str) -> None:
+    if not os.path.exists(log_path):
+        raise FileNotFoundError(f"Log file not found: {log_path}")
+    if file_compression(log_path):
+        raise ValueError("Entries cannot be loaded from compressed logs.")
+    require_standard_format(log_path, "Entry stores")
+
+
+def read_entries(
+    log_path: str,
+    level: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> LogEntries:
+    """
+    Load the entries of a time-ordered log file into a LogEntries store.
+
+    The file is memory-mapped and only the byte range of the [start, end]
+    window is scanned (located by binary search).
+
+    Raises:
+        FileNotFoundError: If the log file does not exist.
+        ValueError: If the level or window is invalid, or the log is compressed
+            or not in the standard format.
+    """
+    if level is not None and level not in _LEVEL_CODES:
+        raise ValueError(f"Unknown level '{level}'. Expected one of: {', '.join(LOG_LEVELS)}")
+    _check_loadable(log_path)
+
+    start_bound = parse_time_bound(start) if start else None
+    end_bound = parse_time_bound(end) if end else None
+    if start_bound and end_bound and start_bound > end_bound:
+        raise ValueError("start must not be after end.")
+
+    entries = LogEntries(log_path)
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return entries
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first = seek_timestamp(mm, size, start_bound) if start_bound else 0
+            last = seek_timestamp(mm, size, end_bound, inclusive=False) if end_bound else size
+            entries.extend_from_buffer(mm, first, max(first, last), level)
+    return entries
+
+
+class _Store:
+    """A cached whole-file LogEntries store, the file identity it belongs to and how far it got."""
+
+    __slots__ = ("entries", "device", "inode", "size", "mtime_ns", "head", "offset", "rows", "lock")
+
+    def __init__(self):
+        self.entries: Optional[LogEntries] = None
+        self.device = self.inode = self.size = self.mtime_ns = None
+        self.head = b""
+        self.offset = 0     # first byte after the last complete line loaded
+        self.rows = 0       # rows of bytes [0, offset); any later ones are the unterminated last line
+        self.lock = threading.Lock()
+
+    def same_file(self, st: os.stat_result) -> bool:
+        return (self.device, self.inode) == (st.st_dev, st.st_ino)
+
+    def unchanged(self, st: os.stat_result) -> bool:
+        return self.same_file(st) and (self.size, self.mtime_ns) == (st.st_size, st.st_mtime_ns)
+
+    def refresh(self, real_path: str) -> None:
+        """Load the lines appended since the last call, or the whole file if it was replaced."""
+        with open(real_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if self.entries is not None and self.unchanged(st):
+                return
+            head = f.read(CHECKPOINT_HEAD_BYTES)
+            resume = (
+                self.entries is not None
+                and self.same_file(st)
+                and st.st_size >= self.size
+                and head[:len(self.head)] == self.head
+            )
+            if resume:
+                # The unterminated last line may have grown: load it again
+                self.entries.truncate(self.rows)
+            else:
+                _check_loadable(real_path)
+                self.entries, self.offset, self.rows = LogEntries(real_path), 0, 0
+
+            if st.st_size > self.offset:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    size = min(len(mm), st.st_size)
+                    offset = mm.rfind(b"\n", self.offset, size) + 1 or self.offset
+                    self.entries.extend_from_buffer(mm, self.offset, offset, max_bytes=ENTRIES_CACHE_BYTES)
+                    self.offset, self.rows = offset, len(self.entries)
+                    self.entries.extend_from_buffer(mm, offset, size, max_bytes=ENTRIES_CACHE_BYTES)
+            self.device, self.inode, self.size, self.mtime_ns = st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+            self.head = head
+
+
+_stores: "OrderedDict[str, _Store]" = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def cached_entries(log_path: str) -> LogEntries:
+    """
+    The whole-file LogEntries store of a log. Filter it with select().
+
+    The store is loaded once and then only extended with the lines appended
+    since the last call, as incremental analysis does. A shrunk file, a new
+    inode (rotation) or a changed head (truncated and rewritten) reloads it
+    from scratch.
+
+    Raises:
+        FileNotFoundError: If the log file does not exist.
+        ValueError: If the log is compressed, not in the standard format, or
+            its store would outgrow ENTRIES_CACHE_BYTES.
+    """
+    if not os.path.exists(log_path):
+        raise FileNotFoundError(f"Log file not found: {log_path}")
+    real_path = os.path.realpath(log_path)
+    with _stores_lock:
+        store = _stores.get(real_path)
+        if store is None:
+            store = _stores[real_path] = _Store()
+        _stores.move_to_end(real_path)
+
+    with store.lock:
+        try:
+            store.refresh(real_path)
+        except Exception:
+            with _stores_lock:
+                if _stores.get(real_path) is store:
+                    del _stores[real_path]
+            raise
+        entries = store.entries
+
+    with _stores_lock:
+        # A single store is within the budget, so dropping the others is always enough
+        while len(_stores) > 1 and (
+            len(_stores) > ENTRIES_CACHE_LIMIT
+            or sum(cached.entries.nbytes for cached in _stores.values() if cached.entries) > ENTRIES_CACHE_BYTES
+        ):
+            _stores.popitem(last=False)
+    return entries
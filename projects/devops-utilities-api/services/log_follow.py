@@ -0,0 +1,229 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Iterator, Optional
+
+from services.log_service import STREAM_CHUNK
+
+
+# Seconds between stat() checks when inotify is unavailable
+FOLLOW_POLL_INTERVAL = 1.0
+# Bytes inspected at the end of a file to start following at its last complete line
+FOLLOW_TAIL_BYTES = 64 << 10
+
+# inotify(7) event bits used to watch a log's directory
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+# Events that concern the watch itself rather than a named file
+_WATCH_EVENTS = _IN_Q_OVERFLOW | _IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Blocking wait for changes to one file name in a directory (Linux inotify via libc)."""
+
+    def __init__(self, fd: int, name: bytes):
+        self._fd = fd
+        self._name = name
+
+    @classmethod
+    def watch(cls, log_path: str) -> Optional["_Inotify"]:
+        """Watch the directory of `log_path`, or return None where inotify is unavailable."""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        # The directory is watched so a rotated-in file of the same name is seen too
+        directory = os.path.dirname(os.path.abspath(log_path))
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return cls(fd, os.fsencode(os.path.basename(log_path)))
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the watched name changes (True) or `timeout` seconds pass (False)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if ready and self._drain():
+                return True
+
+    async def wait_async(self, timeout: float) -> bool:
+        """wait() on the running event loop: the fd is watched by the loop, so no thread is held."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            readable = loop.create_future()
+            loop.add_reader(self._fd, lambda: readable.done() or readable.set_result(None))
+            try:
+                await asyncio.wait_for(readable, remaining)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                loop.remove_reader(self._fd)
+            if self._drain():
+                return True
+
+    def _drain(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 << 10)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name == self._name or mask & _WATCH_EVENTS:
+                    relevant = True
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class LogFollower:
+    """
+    Follow a growing log file like `tail -F`, yielding only complete new lines.
+
+    Rotation (the name now points at a new inode) is handled by finishing the
+    old file and reopening the new one from its start; truncation in place
+    (copytruncate) restarts from offset 0. Waiting uses inotify on Linux and a
+    slow stat() poll elsewhere, so an idle file costs no CPU. wait_async() is
+    the same wait for event-loop callers and holds no thread while idle.
+    """
+
+    def __init__(self, log_path: str, from_start: bool = True, poll_interval: float = FOLLOW_POLL_INTERVAL):
+        self.log_path = log_path
+        self.poll_interval = poll_interval
+        self.rotations = 0
+        self.truncations = 0
+        self._file = None
+        self._identity = None
+        self._partial = b""
+        self._open(from_start)
+        self._inotify = _Inotify.watch(log_path)
+
+    def _open(self, from_start: bool) -> None:
+        f = open(self.log_path, "rb")
+        st = os.fstat(f.fileno())
+        if not from_start and st.st_size:
+            # Start at the last complete line, so an in-progress line is read whole
+            tail = max(st.st_size - FOLLOW_TAIL_BYTES, 0)
+            f.seek(tail)
+            f.seek(tail + f.read().rfind(b"\n") + 1)
+        self._file = f
+        self._identity = (st.st_dev, st.st_ino)
+        self._partial = b""
+
+    def read_lines(self) -> Iterator[str]:
+        """Yield the complete lines appended since the last call, following rotation and truncation."""
+        while True:
+            data = self._file.read(STREAM_CHUNK)
+            if data:
+                cut = data.rfind(b"\n") + 1
+                if not cut:
+                    self._partial += data
+                    continue
+                data, self._partial = self._partial + data[:cut], data[cut:]
+                yield from data.decode("utf-8", "replace").split("\n")[:-1]
+                continue
+
+            if os.fstat(self._file.fileno()).st_size < self._file.tell():
+                # Truncated in place: start over
+                self.truncations += 1
+                self._file.seek(0)
+                self._partial = b""
+                continue
+            try:
+                st = os.stat(self.log_path)
+            except FileNotFoundError:
+                return  # rotated away and not recreated yet; keep the old file
+            if (st.st_dev, st.st_ino) == self._identity:
+                return
+
+            # Rotated: the old file is complete, so its last partial line is final
+            if self._partial:
+                yield self._partial.decode("utf-8", "replace")
+            self._file.close()
+            self._open(from_start=True)
+            self.rotations += 1
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the log may have changed (True) or `timeout` seconds pass (False)."""
+        if self._inotify is not None:
+            return self._inotify.wait(timeout)
+
+        deadline = time.monotonic() + timeout
+        while not self._pending():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+        return True
+
+    async def wait_async(self, timeout: float) -> bool:
+        """wait() for asyncio callers: sleeps on the event loop instead of blocking a thread."""
+        if self._inotify is not None:
+            return await self._inotify.wait_async(timeout)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self._pending():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.poll_interval, remaining))
+        return True
+
+    def _pending(self) -> bool:
+        """Whether the file grew, shrank or was replaced since the last read."""
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return False
+        return (st.st_dev, st.st_ino) != self._identity or st.st_size != self._file.tell()
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LogFollower":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
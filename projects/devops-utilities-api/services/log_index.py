@@ -0,0 +1,366 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import deque
+from typing import BinaryIO, Optional
+
+from services.log_service import (
+    ERROR_LEVELS,
+    LOG_LEVELS,
+    LOG_LINE_BYTES,
+    LOG_PATTERN,
+    RECENT_LIMIT,
+    LogStats,
+    entry_from_match,
+    file_compression,
+    require_standard_format,
+    scan_file,
+)
+
+
+# Sidecar layout:
+#   MAGIC | u32 header capacity | u32 header length | JSON header, padded to its capacity
+#   | one fixed-capacity i64 column each for:
+#       the byte offset of every line of each level, in LOG_LEVELS order, so the
+#       last N lines of a level can be read without a rescan;
+#       the minute index and ERROR/CRITICAL count of each minute that had any.
+# Columns keep spare capacity, so extending the index writes only the new values
+# and the header; the file is rewritten (capacities doubled) only when one fills up.
+INDEX_MAGIC = b"LOGIDX2\n"
+INDEX_SUFFIX = ".idx"
+INDEX_HEAD_BYTES = 256
+INDEX_HEADER_CAPACITY = 4 << 10
+INDEX_MIN_CAPACITY = 1024
+
+# Optional directory for sidecars when log directories are read-only
+INDEX_DIR = os.environ.get("LOG_INDEX_DIR")
+
+_PREAMBLE = struct.Struct("<II")
+_COLUMNS = LOG_LEVELS + ("error_minutes", "error_counts")
+_COLUMN_TYPE = "q"
+_COLUMN_SIZE = array(_COLUMN_TYPE).itemsize
+
+_index_lock = threading.Lock()
+
+
+def index_path_for(log_path: str) -> str:
+    """Return the sidecar path used for a log file."""
+    real_path = os.path.realpath(log_path)
+    if INDEX_DIR:
+        digest = hashlib.sha1(real_path.encode()).hexdigest()
+        return os.path.join(INDEX_DIR, digest + INDEX_SUFFIX)
+    return real_path + INDEX_SUFFIX
+
+
+def build_index(log_path: str) -> dict:
+    """
+    Build (or bring up to date) the sidecar index of a log file.
+
+    The index holds per-level line offsets, per-minute ERROR/CRITICAL counts
+    and the first/last timestamps of the complete lines of the log. An
+    existing index of the same file is extended with the appended bytes only,
+    written in place; a rotated, truncated or rewritten file is re-indexed
+    from scratch.
+
+    Args:
+        log_path (str): Path to the log file.
+
+    Returns:
+        dict: The index header (counts, timestamps, indexed byte range, ...).
+
+    Raises:
+        FileNotFoundError: If the log file does not exist.
+        ValueError: If the log file is compressed.
+    """
+    _check_indexable(log_path)
+
+    with _index_lock:
+        header, idx = _sync_index(os.path.realpath(log_path))
+    idx.close()
+    return header
+
+
+def analyze_with_index(
+    log_path: str,
+    filter_level: Optional[str] = None,
+    recent: int = RECENT_LIMIT,
+) -> dict:
+    """
+    Answer a log summary from the sidecar index instead of rescanning the file.
+
+    The index is built or extended first when the log changed. Counts come from
+    the index header, per-minute error counts are read as binary columns, and
+    the `recent` last errors/warnings are read by seeking straight to their
+    offsets. Only a trailing, not yet terminated line is parsed.
+
+    Returns:
+        dict: Same shape as analyze_log_file().
+
+    Raises:
+        FileNotFoundError: If the log file does not exist.
+        ValueError: If the log file is empty or compressed.
+    """
+    _check_indexable(log_path)
+
+    real_path = os.path.realpath(log_path)
+    with _index_lock:
+        header, idx = _sync_index(real_path)
+
+    stats = LogStats()
+    stats.counts.update(header["counts"])
+    stats.total_lines = header["total_lines"]
+    stats.unknown_lines = header["unknown_lines"]
+    stats.recent_errors = deque(maxlen=recent)
+    stats.recent_warnings = deque(maxlen=recent)
+
+    with idx, open(real_path, "rb") as log:
+        stats.error_minutes = _read_column(idx, header, "error_minutes", 0, header["lengths"]["error_minutes"])
+        stats.error_counts = _read_column(idx, header, "error_counts", 0, header["lengths"]["error_counts"])
+        if header["error_minute"]:
+            stats.error_minutes.append(header["error_minute"][0])
+            stats.error_counts.append(header["error_minute"][1])
+        for level, window in (("ERROR", stats.recent_errors), ("WARNING", stats.recent_warnings)):
+            for offset in _tail_offsets(idx, header, level, recent):
+                log.seek(offset)
+                match = LOG_PATTERN.match(log.readline().decode("utf-8", "replace").strip())
+                if match:
+                    window.append(entry_from_match(match))
+
+    stats.merge(scan_file(real_path, header["offset"]))
+
+    if not stats.total_lines:
+        raise ValueError("Log file is empty.")
+    return stats.summary(os.path.basename(log_path), filter_level)
+
+
+def _check_indexable(log_path: str) -> None:
+    if not os.path.exists(log_path):
+        raise FileNotFoundError(f"Log file not found: {log_path}")
+    # Offsets into a compressed stream cannot be seeked to
+    if file_compression(log_path):
+        raise ValueError("Compressed logs cannot be indexed.")
+    require_standard_format(log_path, "Sidecar indexes")
+
+
+def _sync_index(real_path: str) -> tuple[dict, BinaryIO]:
+    """
+    Load the sidecar of a log, extending or rebuilding it when the log changed.
+
+    Returns the header and the sidecar opened for reading, as synced.
+    """
+    idx_path = index_path_for(real_path)
+    with open(real_path, "rb") as f:
+        # Other processes syncing the same sidecar wait here (advisory lock on the log itself)
+        fcntl.flock(f, fcntl.LOCK_EX)
+        st = os.fstat(f.fileno())
+        head = f.read(INDEX_HEAD_BYTES)
+
+        header = _read_header(idx_path)
+        if header is not None and _unchanged(header, st):
+            return header, open(idx_path, "rb")
+
+        resume = (
+            header is not None
+            and (header["device"], header["inode"]) == (st.st_dev, st.st_ino)
+            and st.st_size >= header["file_size"]
+            and head.startswith(bytes.fromhex(header["head"]))
+        )
+        if not resume:
+            header = {
+                "offset": 0,
+                "total_lines": 0,
+                "unknown_lines": 0,
+                "counts": {level: 0 for level in LOG_LEVELS},
+                "first_timestamp": None,
+                "last_timestamp": None,
+                "minutes": 0,
+                "last_minute": None,
+                "error_minute": None,
+                "lengths": {column: 0 for column in _COLUMNS},
+            }
+
+        appended = {column: array(_COLUMN_TYPE) for column in _COLUMNS}
+        _index_range(real_path, st.st_size, header, appended)
+        header.update(
+            version=2,
+            log_file=real_path,
+            device=st.st_dev,
+            inode=st.st_ino,
+            file_size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            head=head.hex(),
+        )
+        if not (resume and _append_index(idx_path, header, appended)):
+            columns = _read_columns(idx_path, header) if resume else {column: array(_COLUMN_TYPE) for column in _COLUMNS}
+            for column in _COLUMNS:
+                columns[column].extend(appended[column])
+            _write_index(idx_path, header, columns)
+        return header, open(idx_path, "rb")
+
+
+def _unchanged(header: dict, st: os.stat_result) -> bool:
+    return (
+        (header["device"], header["inode"]) == (st.st_dev, st.st_ino)
+        and (header["file_size"], header["mtime_ns"]) == (st.st_size, st.st_mtime_ns)
+    )
+
+
+def _index_range(real_path: str, size: int, header: dict, appended: dict) -> None:
+    """
+    Index the complete lines between header["offset"] and `size`.
+
+    Header counters are updated in place and the new column values are added
+    to `appended`. The ERROR/CRITICAL count of the last minute stays open in
+    the header, since the next lines may still belong to it.
+    """
+    start = header["offset"]
+    if size <= start:
+        return
+
+    counts = header["counts"]
+    first = header["first_timestamp"]
+    last = None
+    minutes = header["minutes"]
+    last_minute = header["last_minute"].encode() if header["last_minute"] else None
+    errors = LogStats()
+    if header["error_minute"]:
+        errors.error_minutes.append(header["error_minute"][0])
+        errors.error_counts.append(header["error_minute"][1])
+    total = unknown = 0
+
+    with open(real_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Only complete lines are indexed; a trailing partial line is parsed at query time
+            end = mm.rfind(b"\n", start, size) + 1 or start
+            for match in LOG_LINE_BYTES.finditer(mm, start, end):
+                timestamp, level = match.group("timestamp", "level")
+                if level is None:
+                    if match.group("other") is not None:
+                        total += 1
+                        unknown += 1
+                    continue
+
+                total += 1
+                level = level.decode()
+                counts[level] += 1
+                appended[level].append(match.start())
+                if level in ERROR_LEVELS:
+                    errors.count_errors(timestamp[:16])
+
+                minute = timestamp[:10] + b" " + timestamp[11:16]
+                if minute != last_minute:
+                    minutes += 1
+                    last_minute = minute
+                if first is None:
+                    first = timestamp.decode()
+                last = timestamp
+
+    if errors.error_minutes:
+        # Closed minutes go to the columns; the last one stays open in the header
+        appended["error_minutes"].extend(errors.error_minutes[:-1])
+        appended["error_counts"].extend(errors.error_counts[:-1])
+        header["error_minute"] = [errors.error_minutes[-1], errors.error_counts[-1]]
+    header.update(
+        offset=end,
+        total_lines=header["total_lines"] + total,
+        unknown_lines=header["unknown_lines"] + unknown,
+        first_timestamp=first,
+        last_timestamp=last.decode() if last is not None else header["last_timestamp"],
+        minutes=minutes,
+        last_minute=last_minute.decode() if last_minute is not None else None,
+    )
+
+
+def _read_header(idx_path: str) -> Optional[dict]:
+    """Return the header of a sidecar, or None for a missing, outdated or corrupt one."""
+    try:
+        with open(idx_path, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            capacity, length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            header = json.loads(f.read(length))
+            header["header_capacity"] = capacity
+            return header
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _read_column(f, header: dict, column: str, start: int, stop: int) -> array:
+    """Read values [start, stop) of one column."""
+    values = array(_COLUMN_TYPE)
+    if stop > start:
+        f.seek(header["columns"][column][0] + start * _COLUMN_SIZE)
+        values.fromfile(f, stop - start)
+    return values
+
+
+def _read_columns(idx_path: str, header: dict) -> dict:
+    with open(idx_path, "rb") as f:
+        return {column: _read_column(f, header, column, 0, header["lengths"][column]) for column in _COLUMNS}
+
+
+def _tail_offsets(f, header: dict, level: str, n: int) -> array:
+    """Read only the last `n` offsets of one level's column."""
+    length = header["lengths"][level]
+    return _read_column(f, header, level, max(length - n, 0), length)
+
+
+def _encode_header(header: dict) -> bytes:
+    return json.dumps({k: v for k, v in header.items() if k != "header_capacity"}, separators=(",", ":")).encode()
+
+
+def _append_index(idx_path: str, header: dict, appended: dict) -> bool:
+    """
+    Write the appended values into the spare capacity of each column, then
+    the header, in place. Return False (writing nothing) when they do not fit.
+    """
+    lengths = dict(header["lengths"])
+    for column in _COLUMNS:
+        lengths[column] += len(appended[column])
+        if lengths[column] > header["columns"][column][1]:
+            return False
+    encoded = _encode_header(dict(header, lengths=lengths))
+    if len(encoded) > header["header_capacity"]:
+        return False
+
+    with open(idx_path, "r+b") as f:
+        fd = f.fileno()
+        for column in _COLUMNS:
+            if appended[column]:
+                position = header["columns"][column][0] + header["lengths"][column] * _COLUMN_SIZE
+                os.pwrite(fd, appended[column].tobytes(), position)
+        # The header goes last: until it is written the new values are ignored
+        os.pwrite(fd, _PREAMBLE.pack(header["header_capacity"], len(encoded)) + encoded, len(INDEX_MAGIC))
+    header["lengths"] = lengths
+    return True
+
+
+def _write_index(idx_path: str, header: dict, columns: dict) -> None:
+    """Atomically write the whole sidecar, giving every column room to double."""
+    header["lengths"] = {column: len(columns[column]) for column in _COLUMNS}
+    header["columns"] = {column: [0, max(INDEX_MIN_CAPACITY, 2 * len(columns[column]))] for column in _COLUMNS}
+    # Room for the column positions (not yet known) and for the header to grow
+    capacity = max(INDEX_HEADER_CAPACITY, 2 * len(_encode_header(header)))
+    position = len(INDEX_MAGIC) + _PREAMBLE.size + capacity
+    for column in _COLUMNS:
+        header["columns"][column][0] = position
+        position += header["columns"][column][1] * _COLUMN_SIZE
+    header["header_capacity"] = capacity
+    encoded = _encode_header(header)
+
+    tmp_path = f"{idx_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(_PREAMBLE.pack(capacity, len(encoded)))
+        f.write(encoded)
+        for column in _COLUMNS:
+            f.seek(header["columns"][column][0])
+            columns[column].tofile(f)
+        # Unwritten capacity stays a hole in the file
+        f.truncate(position)
+    os.replace(tmp_path, idx_path)
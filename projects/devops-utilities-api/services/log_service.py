@@ -1,108 +1,1527 @@
+import bz2
+import glob
+import json
+import lzma
+import mmap
+import multiprocessing
 import os
 import re
-from collections import defaultdict
-from datetime import datetime
-from typing import Optional
+import threading
+import zlib
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import Counter, OrderedDict, defaultdict, deque
+from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from services.log_bursts import detect_bursts, minute_index
+from services.log_templates import TemplateMiner
+
+try:
+    from compression.zstd import ZstdDecompressor as _ZstdDecompressor, ZstdError as _ZstdError  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard
+    except ImportError:
+        _ZstdDecompressor = _ZstdError = None
+    else:
+        _ZstdError = zstandard.ZstdError
+
+        def _ZstdDecompressor():
+            return _ZstandardDecompressor()
 
 
 # Regex pattern to parse a standard log line:
 #   2025-01-10 09:00:01 INFO Application started successfully
+# Separators are spaces/tabs and digits ASCII, exactly as in the bytes patterns
+# below, so the stream and mmap engines accept the same lines
 LOG_PATTERN = re.compile(
-    r"(?P<timestamp>\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})\s+"
+    r"(?P<timestamp>\d{4}-\d{2}-\d{2}[ \t]\d{2}:\d{2}:\d{2})[ \t]+"
     r"(?P<level>INFO|WARNING|ERROR|DEBUG|CRITICAL)"
-    r"(?P<message>.*)"
+    r"(?P<message>.*)",
+    re.ASCII,
 )
 
+# Whitespace stripped off text lines: the ASCII set bytes.strip() and the bytes
+# patterns use (str.strip() would also strip e.g. NBSP), so blank lines agree too
+LINE_WHITESPACE = " \t\n\r\x0b\x0c"
+
+# Bytes counterparts of LOG_PATTERN used by the mmap engine. Each match
+# consumes exactly one line (newline included), so findall()/finditer() step
+# through a buffer line by line without any per-line Python code. Whitespace
+# classes exclude "\n" so a match never spans two lines. A line is blank when
+# neither the level nor the `other` (first non-blank byte) group matched.
+LOG_LINE_BYTES = re.compile(
+    rb"[^\S\n]*(?:"
+    rb"(?P<timestamp>\d{4}-\d{2}-\d{2}[ \t]\d{2}:\d{2}:\d{2})[ \t]+"
+    rb"(?P<level>INFO|WARNING|ERROR|DEBUG|CRITICAL)"
+    rb"|(?P<other>\S))?[^\n]*\n?"
+)
+# Same shape with only the minute of the timestamp captured, for tallying with findall()
+_LINE_LEVELS_BYTES = re.compile(
+    rb"[^\S\n]*(?:"
+    rb"(\d{4}-\d{2}-\d{2}[ \t]\d{2}:\d{2}):\d{2}[ \t]+"
+    rb"(INFO|WARNING|ERROR|DEBUG|CRITICAL)"
+    rb"|(\S))?[^\n]*\n?"
+)
+
+# Bytes scanned per findall() call by the mmap engine
+SCAN_CHUNK = 1 << 20
+
+# Smallest byte range worth handing to a worker process in parallel mode
+PARALLEL_MIN_CHUNK = 8 << 20
+
+# Worker processes shared by all parallel scans and batches of this process
+# (LOG_WORKER_PROCESSES overrides it); requests queue for them rather than fork their own
+WORKER_PROCESSES = int(os.environ.get("LOG_WORKER_PROCESSES", os.cpu_count() or 1))
+
+# Incremental analysis: number of files checkpointed (LRU) and the number of
+# leading bytes compared to detect a file that was truncated and rewritten
+CHECKPOINT_LIMIT = 64
+CHECKPOINT_HEAD_BYTES = 256
+
+# Bytes read per call when streaming a file object (compressed or not); also the
+# most a compressed chunk is expanded to at a time and the largest piece parsed at once
+STREAM_CHUNK = 256 << 10
+
+# Longest line the stream parser holds back whole; the rest of a longer line is dropped
+MAX_LINE_BYTES = 1 << 20
+
+# Compressed input fed per call to the zstandard package, which cannot bound its output
+ZSTANDARD_INPUT_SLICE = 1 << 10
+
+# Compressed logs are recognised by their magic bytes, not their extension
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+_MAGIC_LENGTH = max(len(magic) for magic, _ in COMPRESSION_MAGIC)
+_DECOMPRESSORS = {
+    "gzip": lambda: zlib.decompressobj(wbits=31),
+    "bz2": bz2.BZ2Decompressor,
+    "xz": lzma.LZMADecompressor,
+    "zstd": _ZstdDecompressor,
+}
+# Errors the decompressors raise on corrupt input (bz2 raises OSError)
+_DECOMPRESS_ERRORS = (zlib.error, lzma.LZMAError, OSError, EOFError) + ((_ZstdError,) if _ZstdError else ())
+
+LOG_LEVELS = ("INFO", "WARNING", "ERROR", "DEBUG", "CRITICAL")
+_LEVELS_BY_BYTES = {level.encode(): level for level in LOG_LEVELS}
+# Canonical level strings, so retained entries share one object per level
+_LEVEL_NAMES = {level: level for level in LOG_LEVELS}
+# Level by its first four characters, for the fixed-offset fast path of LogStats.add_line
+_LEVEL_PREFIXES = {level[:4]: level for level in LOG_LEVELS}
+# Two ASCII digits, for the seconds checked by that fast path (str.isdecimal() is Unicode-wide)
+_TWO_DIGITS = frozenset(f"{n:02d}" for n in range(100))
+# Levels whose per-minute counts feed the burst detector
+ERROR_LEVELS = ("ERROR", "CRITICAL")
+_ERROR_LEVELS_BYTES = tuple(level.encode() for level in ERROR_LEVELS)
+
+# Parsing engines accepted by analyze_log_file
+ENGINES = ("stream", "mmap")
+
+# Number of recent errors / warnings kept in a summary
+RECENT_LIMIT = 5
+
+# Batch analysis: upper bound on files per call, and the health labels from best to worst
+BATCH_FILE_LIMIT = 1000
+HEALTH_ORDER = ("Healthy", "Warning", "Degraded", "Critical")
+
+# Format auto-detection samples this many non-blank lines (at most this many bytes)
+FORMAT_SAMPLE_LINES = 50
+FORMAT_SAMPLE_BYTES = 64 << 10
+AUTO_FORMAT = "auto"
+STANDARD_FORMAT = "standard"
+
+
+# ── Line formats ─────────────────────────────────────────
+
+class LogFormat:
+    """
+    A registered line format.
+
+    `parse` turns one stripped line into (timestamp, level, message), with the
+    timestamp normalized to `YYYY-MM-DD HH:MM:SS` (or None when the line has
+    none) and the level one of LOG_LEVELS, or returns None for a line that is
+    not in this format.
+    """
+
+    __slots__ = ("name", "description", "parse")
+
+    def __init__(self, name: str, description: str, parse: Callable[[str], Optional[tuple]]):
+        self.name = name
+        self.description = description
+        self.parse = parse
+
+
+# Registered formats by name, in detection priority order
+LOG_FORMATS: dict[str, LogFormat] = {}
+
+
+def register_format(name: str, description: str):
+    """Decorator registering a parse function as the line format `name`."""
+    def register(parse: Callable[[str], Optional[tuple]]):
+        LOG_FORMATS[name] = LogFormat(name, description, parse)
+        return parse
+    return register
+
+
+# Level spellings of other producers (syslog keywords, logging libraries)
+_LEVEL_ALIASES = {
+    **{level: level for level in LOG_LEVELS},
+    "WARN": "WARNING", "ERR": "ERROR", "SEVERE": "ERROR", "FATAL": "CRITICAL", "CRIT": "CRITICAL",
+    "ALERT": "CRITICAL", "EMERG": "CRITICAL", "EMERGENCY": "CRITICAL", "PANIC": "CRITICAL",
+    "NOTICE": "INFO", "INFORMATION": "INFO", "TRACE": "DEBUG",
+}
+# Numeric levels of pino/bunyan style loggers, highest threshold first
+_NUMERIC_LEVELS = ((60, "CRITICAL"), (50, "ERROR"), (40, "WARNING"), (30, "INFO"), (10, "DEBUG"))
+_ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}")
+
+
+def _normalize_level(value) -> Optional[str]:
+    if isinstance(value, str):
+        return _LEVEL_ALIASES.get(value.upper())
+    if isinstance(value, int) and not isinstance(value, bool):
+        return next((level for threshold, level in _NUMERIC_LEVELS if value >= threshold), None)
+    return None
+
+
+def _normalize_timestamp(value) -> Optional[str]:
+    """`YYYY-MM-DD HH:MM:SS` of an ISO 8601 string (as written, offset dropped) or epoch seconds/ms."""
+    if isinstance(value, str):
+        return value[:10] + " " + value[11:19] if _ISO_TIMESTAMP.match(value) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            moment = datetime.fromtimestamp(value / 1000 if value > 1e11 else value, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+        return moment.strftime("%Y-%m-%d %H:%M:%S")
+    return None
+
+
+@register_format(STANDARD_FORMAT, "YYYY-MM-DD HH:MM:SS LEVEL message")
+def _parse_standard(line: str) -> Optional[tuple]:
+    match = LOG_PATTERN.match(line)
+    return match.group("timestamp", "level", "message") if match else None
+
+
+_JSON_TIME_KEYS = ("timestamp", "time", "@timestamp", "ts", "datetime")
+_JSON_LEVEL_KEYS = ("level", "severity", "lvl", "loglevel", "levelname")
+_JSON_MESSAGE_KEYS = ("message", "msg", "event", "log")
+
+
+@register_format("json", "JSON lines with level/severity, message/msg and timestamp/time fields")
+def _parse_json(line: str) -> Optional[tuple]:
+    if not line.startswith("{"):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    level = timestamp = None
+    message = ""
+    for key in _JSON_LEVEL_KEYS:
+        if key in record:
+            level = _normalize_level(record[key])
+            break
+    if level is None:
+        return None
+    for key in _JSON_TIME_KEYS:
+        if key in record:
+            timestamp = _normalize_timestamp(record[key])
+            break
+    for key in _JSON_MESSAGE_KEYS:
+        if key in record:
+            message = record[key]
+            break
+    return timestamp, level, message if isinstance(message, str) else json.dumps(message)
+
+
+# RFC 5424: <PRI>1 TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+SYSLOG_PATTERN = re.compile(
+    r"<(?P<pri>\d{1,3})>1 (?P<timestamp>\S+) \S+ \S+ \S+ \S+ "
+    r"(?:-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (?P<message>.*))?$"
+)
+# Level of each syslog severity (PRI % 8): emerg, alert, crit, err, warning, notice, info, debug
+_SYSLOG_LEVELS = ("CRITICAL", "CRITICAL", "CRITICAL", "ERROR", "WARNING", "INFO", "INFO", "DEBUG")
+
+
+@register_format("syslog", "RFC 5424 syslog (level from the PRI severity)")
+def _parse_syslog(line: str) -> Optional[tuple]:
+    match = SYSLOG_PATTERN.match(line)
+    if not match:
+        return None
+    message = match.group("message") or ""
+    return (
+        _normalize_timestamp(match.group("timestamp")),
+        _SYSLOG_LEVELS[int(match.group("pri")) % 8],
+        message.lstrip("\ufeff"),
+    )
+
+
+# Common/combined access log: host ident user [10/Jan/2025:09:00:01 +0000] "request" status size ...
+ACCESS_PATTERN = re.compile(
+    r'\S+ \S+ \S+ \[(?P<day>\d{2})/(?P<month>[A-Z][a-z]{2})/(?P<year>\d{4}):(?P<time>\d{2}:\d{2}:\d{2})[^\]]*\] '
+    r'(?P<message>"[^"]*" (?P<status>\d{3}) .*)'
+)
+_MONTHS = {month: f"{number:02d}" for number, month in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1
+)}
+
+
+@register_format("access", "nginx/Apache common or combined access log (level from the status code)")
+def _parse_access(line: str) -> Optional[tuple]:
+    match = ACCESS_PATTERN.match(line)
+    if not match or match.group("month") not in _MONTHS:
+        return None
+    status = match.group("status")
+    level = "ERROR" if status >= "500" else "WARNING" if status >= "400" else "INFO"
+    year, month, day, time_of_day = match.group("year", "month", "day", "time")
+    return f"{year}-{_MONTHS[month]}-{day} {time_of_day}", level, match.group("message")
+
+
+def detect_format(lines: Iterable[str]) -> str:
+    """
+    Name of the registered format that parses most of the first non-blank lines.
+
+    Ties go to the earlier registered format, and a sample nothing parses is
+    treated as the standard format.
+    """
+    sample = list(islice(filter(None, (line.strip(LINE_WHITESPACE) for line in lines)), FORMAT_SAMPLE_LINES))
+    best, best_hits = STANDARD_FORMAT, 0
+    for name, log_format in LOG_FORMATS.items():
+        hits = sum(log_format.parse(line) is not None for line in sample)
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
+
+
+def _sample_lines(data: bytes, complete: bool) -> list[str]:
+    lines = data.decode("utf-8", "replace").split("\n")
+    # A cut-off last line would only blur the sample
+    return lines if complete else lines[:-1]
+
+
+def _detect_head_format(buf, start: int, end: int) -> str:
+    # Sample the complete lines of the first FORMAT_SAMPLE_BYTES, as detect_file_format() does
+    sample = bytes(buf[start:line_boundary(buf, start + FORMAT_SAMPLE_BYTES, end)])
+    return detect_format(_sample_lines(sample, True))
+
+
+def detect_file_format(log_path: str) -> str:
+    """Detect the format of a log file (compressed or not) from its first lines."""
+    with open(log_path, "rb") as f:
+        head = f.read(FORMAT_SAMPLE_BYTES)
+        complete = not f.read(1)
+    compression = detect_compression(head)
+    if compression:
+        # Expand only as much as the sample needs
+        sample = bytearray()
+        for piece in _Decompressor(compression).decompress(head):
+            sample += piece
+            if len(sample) >= FORMAT_SAMPLE_BYTES:
+                break
+        head = bytes(sample[:FORMAT_SAMPLE_BYTES])
+        complete = False
+    return detect_format(_sample_lines(head, complete))
+
+
+def check_format(log_format: str) -> None:
+    """Raise ValueError unless `log_format` is "auto" or a registered format."""
+    if log_format != AUTO_FORMAT and log_format not in LOG_FORMATS:
+        raise ValueError(
+            f"Unknown log format '{log_format}'. Expected one of: {', '.join((AUTO_FORMAT, *LOG_FORMATS))}"
+        )
+
+
+def resolve_format(log_format: str, log_path: str) -> str:
+    """The concrete format of a file: `log_format` itself, or the detected one for "auto"."""
+    check_format(log_format)
+    return detect_file_format(log_path) if log_format == AUTO_FORMAT else log_format
+
+
+def require_standard_format(log_path: str, feature: str) -> None:
+    """Raise ValueError when a feature built on the standard layout is asked of another format."""
+    log_format = detect_file_format(log_path)
+    if log_format != STANDARD_FORMAT:
+        raise ValueError(f"{feature} only support the standard log format (detected: {log_format}).")
+
+
+class LogEntry:
+    """
+    One parsed log line, kept compact for the windows and stores that retain entries.
+
+    The level is always one of the shared LOG_LEVELS strings, and the message
+    stays the raw slice (str, or undecoded bytes from the mmap engine) it was
+    cut from until it is first read; it is then decoded and stripped once.
+    """
+
+    __slots__ = ("timestamp", "level", "_message")
+
+    def __init__(self, timestamp: str, level: str, message):
+        self.timestamp = timestamp
+        self.level = _LEVEL_NAMES.get(level, level)
+        self._message = message
+
+    @property
+    def message(self) -> str:
+        message = self._message
+        if isinstance(message, bytes):
+            message = message.decode("utf-8", "replace")
+        message = message.strip()
+        self._message = message
+        return message
+
+    def to_dict(self) -> dict:
+        return {"timestamp": self.timestamp, "level": self.level, "message": self.message}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LogEntry):
+            return NotImplemented
+        return (self.timestamp, self.level, self.message) == (other.timestamp, other.level, other.message)
+
+    def __repr__(self) -> str:
+        return f"LogEntry({self.timestamp!r}, {self.level!r}, {self.message!r})"
+
+
+class LogStats:
+    """
+    Running aggregates for a single pass over a log.
+
+    Only counters, two bounded windows (the most recent errors and warnings)
+    and the ERROR/CRITICAL count of each minute that had any are kept, so
+    memory grows with the time span of the log, not with its number of lines.
+    With `templates` > 0 every message also goes through a bounded
+    TemplateMiner, and the summary lists that many top templates per level.
+
+    `log_format` names the line format (see LOG_FORMATS); "auto" is resolved
+    by detect_format() from the first lines fed in.
+    """
+
+    __slots__ = ("counts", "total_lines", "unknown_lines", "recent_errors", "recent_warnings",
+                 "error_minutes", "error_counts", "templates", "log_format", "_minute", "_error_minute")
+
+    def __init__(self, templates: int = 0, log_format: str = STANDARD_FORMAT):
+        check_format(log_format)
+        self.log_format = log_format
+        self.counts: dict[str, int] = defaultdict(int)
+        self.total_lines = 0
+        self.unknown_lines = 0
+        self.recent_errors: deque = deque(maxlen=RECENT_LIMIT)
+        self.recent_warnings: deque = deque(maxlen=RECENT_LIMIT)
+        # Per-minute ERROR/CRITICAL counts in log order, as (minute_index(), count) columns
+        self.error_minutes = array("q")
+        self.error_counts = array("q")
+        self._error_minute = None
+        self.templates: Optional[TemplateMiner] = TemplateMiner(top=templates) if templates > 0 else None
+        # "YYYY-MM-DD HH:MM:" prefix of the last line LOG_PATTERN accepted in the fixed layout
+        self._minute = None
+
+    def add_line(self, line: str) -> None:
+        """Parse one raw log line and fold it into the aggregates."""
+        self.add_lines((line,))
+
+    def add_lines(self, lines) -> None:
+        """
+        Parse raw log lines (any iterable, e.g. an open file) into the aggregates.
+
+        Lines in the fixed `YYYY-MM-DD HH:MM:SS LEVEL message` layout whose
+        minute prefix was already validated by LOG_PATTERN are classified by
+        slicing at known offsets; everything else goes through the regex, so
+        the results are identical either way. Other formats go through the
+        parser of their LogFormat.
+        """
+        if self.log_format == AUTO_FORMAT:
+            lines = iter(lines)
+            sample = list(islice(filter(None, (line.strip(LINE_WHITESPACE) for line in lines)), FORMAT_SAMPLE_LINES))
+            if not sample:
+                # Blank lines count for nothing; stay undecided until real content arrives
+                return
+            self.log_format = detect_format(sample)
+            lines = chain(sample, lines)
+        if self.log_format != STANDARD_FORMAT:
+            self._add_parsed(lines, LOG_FORMATS[self.log_format].parse)
+            return
+
+        counts = self.counts
+        prefixes = _LEVEL_PREFIXES
+        miner = self.templates
+        minute = self._minute
+        total = 0
+
+        for line in lines:
+            line = line.strip(LINE_WHITESPACE)
+            if not line:
+                continue
+
+            total += 1
+            level = prefixes.get(line[20:24])
+            if (
+                level is None
+                or line[:17] != minute
+                or line[19] != " "
+                or line[17:19] not in _TWO_DIGITS
+                or not line.startswith(level, 20)
+            ):
+                self._match_line(line)
+                minute = self._minute
+                continue
+
+            counts[level] += 1
+            if level == "ERROR":
+                self.recent_errors.append(LogEntry(line[:19], level, line[25:]))
+                self.count_errors(minute)
+            elif level == "WARNING":
+                self.recent_warnings.append(LogEntry(line[:19], level, line[27:]))
+            elif level == "CRITICAL":
+                self.count_errors(minute)
+            if miner is not None:
+                miner.add(level, line[:19], line[20 + len(level):])
+
+        self.total_lines += total
+
+    def _add_parsed(self, lines, parse: Callable[[str], Optional[tuple]]) -> None:
+        counts = self.counts
+        miner = self.templates
+        total = 0
+
+        for line in lines:
+            line = line.strip(LINE_WHITESPACE)
+            if not line:
+                continue
+
+            total += 1
+            parsed = parse(line)
+            if parsed is None:
+                self.unknown_lines += 1
+                continue
+
+            timestamp, level, message = parsed
+            counts[level] += 1
+            if level == "ERROR":
+                self.recent_errors.append(LogEntry(timestamp, level, message))
+            elif level == "WARNING":
+                self.recent_warnings.append(LogEntry(timestamp, level, message))
+            if level in ERROR_LEVELS and timestamp:
+                self.count_errors(timestamp)
+            if miner is not None:
+                miner.add(level, timestamp, message)
+
+        self.total_lines += total
+
+    def _match_line(self, line: str) -> None:
+        # Regex path for a stripped, non-blank line
+        match = LOG_PATTERN.match(line)
+        if not match:
+            self.unknown_lines += 1
+            return
+
+        level = match.group("level")
+        self.counts[level] += 1
+        if match.start("level") == 20:
+            self._minute = line[:17]
+
+        if level == "ERROR":
+            self.recent_errors.append(entry_from_match(match))
+        elif level == "WARNING":
+            self.recent_warnings.append(entry_from_match(match))
+        if level in ERROR_LEVELS:
+            self.count_errors(match.group("timestamp"))
+        if self.templates is not None:
+            self.templates.add(level, match.group("timestamp"), match.group("message"))
+
+    def count_errors(self, timestamp, n: int = 1) -> None:
+        """Add `n` ERROR/CRITICAL lines to the minute of `timestamp` (str or bytes, minute prefix is enough)."""
+        if timestamp != self._error_minute:
+            self._error_minute = timestamp
+            minute = minute_index(timestamp)
+            if not self.error_minutes or self.error_minutes[-1] != minute:
+                self.error_minutes.append(minute)
+                self.error_counts.append(0)
+        self.error_counts[-1] += n
+
+    def merge(self, other: "LogStats") -> None:
+        """Fold in the aggregates of a later section of the same log."""
+        if self.log_format == AUTO_FORMAT:
+            self.log_format = other.log_format
+        for level, n in other.counts.items():
+            self.counts[level] += n
+        self.total_lines += other.total_lines
+        self.unknown_lines += other.unknown_lines
+        self.recent_errors.extend(other.recent_errors)
+        self.recent_warnings.extend(other.recent_warnings)
+
+        minutes, errors = other.error_minutes, other.error_counts
+        if minutes and self.error_minutes and self.error_minutes[-1] == minutes[0]:
+            # The sections split inside a minute
+            self.error_counts[-1] += errors[0]
+            minutes, errors = minutes[1:], errors[1:]
+        self.error_minutes.extend(minutes)
+        self.error_counts.extend(errors)
+        self._error_minute = None
+
+        if other.templates is not None:
+            if self.templates is None:
+                self.templates = TemplateMiner(top=other.templates.top)
+            self.templates.merge(other.templates)
+
+    def copy(self) -> "LogStats":
+        clone = LogStats(log_format=self.log_format)
+        clone.merge(self)
+        return clone
+
+    def summary(self, log_file: str, filter_level: Optional[str] = None) -> dict:
+        """
+        Build the API summary dict from the aggregates.
+
+        Args:
+            log_file (str): Name reported as `log_file` in the result.
+            filter_level (str, optional): If given, only report the count for that level.
+        """
+        if filter_level:
+            filter_level = filter_level.upper()
+            result = {
+                "log_file": log_file,
+                "filter_level": filter_level,
+                "total_lines": self.total_lines,
+                "matched_count": self.counts.get(filter_level, 0),
+            }
+            if self.templates is not None:
+                result["top_templates"] = self.templates.top_templates(filter_level)
+            return result
+
+        counts = {level: self.counts.get(level, 0) for level in LOG_LEVELS}
+        result = {
+            "log_file": log_file,
+            "log_format": self.log_format,
+            "total_lines": self.total_lines,
+            "unknown_lines": self.unknown_lines,
+            "counts": counts,
+            "health_status": health_status(counts),
+            "recent_errors": [entry.to_dict() for entry in self.recent_errors],
+            "recent_warnings": [entry.to_dict() for entry in self.recent_warnings],
+            "error_bursts": detect_bursts(zip(self.error_minutes, self.error_counts)),
+        }
+        if self.templates is not None:
+            templates = self.templates.top_templates()
+            result["top_templates"] = {level: templates[level] for level in LOG_LEVELS if level in templates}
+        return result
+
+
+def entry_from_match(match: re.Match) -> LogEntry:
+    """Build a LogEntry from a LOG_PATTERN match."""
+    return LogEntry(match.group("timestamp"), match.group("level"), match.group("message"))
+
+
+def scan_buffer(buf, start: int, end: int, stats: LogStats) -> None:
+    """
+    Fold the lines in buf[start:end] into `stats` without decoding them.
+
+    `buf` is any bytes-like object (typically an mmap) and `start` must sit at
+    a line boundary. Lines are tallied chunk by chunk with findall(); only the
+    chunks holding the most recent errors/warnings are revisited, and only the
+    messages that end up in the recent windows are decoded.
+    """
+    if stats.log_format == AUTO_FORMAT:
+        stats.log_format = _detect_head_format(buf, start, end)
+    if stats.templates is not None or stats.log_format != STANDARD_FORMAT:
+        # Template mining needs every message, and other formats their own
+        # parser, so decode and take the text path
+        pos = start
+        while pos < end:
+            chunk_end = line_boundary(buf, pos + SCAN_CHUNK, end)
+            stats.add_lines(bytes(buf[pos:chunk_end]).decode("utf-8", "replace").split("\n"))
+            pos = chunk_end
+        return
+
+    counts = stats.counts
+    recent = {"ERROR": _RecentChunks(), "WARNING": _RecentChunks()}
+
+    pos = start
+    while pos < end:
+        chunk_end = line_boundary(buf, pos + SCAN_CHUNK, end)
+        tally = Counter(_LINE_LEVELS_BYTES.findall(buf, pos, chunk_end))
+        per_level = Counter()
+        error_minutes = Counter()
+        for (minute, level, other), n in tally.items():
+            if level:
+                per_level[level] += n
+                if level in _ERROR_LEVELS_BYTES:
+                    error_minutes[minute] += n
+            elif other:
+                stats.unknown_lines += n
+                stats.total_lines += n
+        for level, n in per_level.items():
+            level = _LEVELS_BY_BYTES[level]
+            counts[level] += n
+            stats.total_lines += n
+            if level in recent:
+                recent[level].add(pos, chunk_end, n)
+        # Fixed-width timestamps sort chronologically
+        for minute in sorted(error_minutes):
+            stats.count_errors(minute, error_minutes[minute])
+        pos = chunk_end
+
+    for level, window in (("ERROR", stats.recent_errors), ("WARNING", stats.recent_warnings)):
+        level_bytes = level.encode()
+        matches: deque = deque(maxlen=RECENT_LIMIT)
+        for chunk_start, chunk_end in recent[level].chunks:
+            for match in LOG_LINE_BYTES.finditer(buf, chunk_start, chunk_end):
+                if match.group("level") == level_bytes:
+                    matches.append(match)
+        window.extend(_entry_from_bytes(match, level) for match in matches)
+
+
+class _RecentChunks:
+    """The fewest trailing chunks that still hold RECENT_LIMIT lines of a level."""
+
+    __slots__ = ("chunks", "_sizes", "_total")
+
+    def __init__(self):
+        self.chunks: deque = deque()
+        self._sizes: deque = deque()
+        self._total = 0
+
+    def add(self, start: int, end: int, n: int) -> None:
+        self.chunks.append((start, end))
+        self._sizes.append(n)
+        self._total += n
+        while self._total - self._sizes[0] >= RECENT_LIMIT:
+            self._total -= self._sizes.popleft()
+            self.chunks.popleft()
+
+
+def _entry_from_bytes(match: re.Match, level: str) -> LogEntry:
+    # The message bytes are decoded only if the entry is read
+    return LogEntry(match.group("timestamp").decode("ascii"), level, match.string[match.end("level"):match.end()])
+
+
+def line_boundary(buf, offset: int, end: int) -> int:
+    """Return the first line start at or after `offset` (capped at `end`)."""
+    if offset <= 0:
+        return 0
+    if offset >= end:
+        return end
+    newline = buf.find(b"\n", offset - 1, end)
+    return end if newline == -1 else newline + 1
+
+
+def detect_compression(head: bytes) -> Optional[str]:
+    """Return the compression format ("gzip", "bz2", "xz", "zstd") of a stream from its first bytes."""
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def file_compression(log_path: str) -> Optional[str]:
+    """Return the compression format of a file on disk, or None if it is plain text."""
+    with open(log_path, "rb") as f:
+        return detect_compression(f.read(_MAGIC_LENGTH))
+
+
+class _ZstandardDecompressor:
+    """
+    The zstandard package's decompressobj() behind the max_length/needs_input
+    interface of compression.zstd.ZstdDecompressor.
+
+    zstandard expands all the input it is given, so input is fed in slices of
+    ZSTANDARD_INPUT_SLICE bytes and the output held until it is asked for.
+    """
+
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        self._input = bytearray()
+        self._output = bytearray()
+        self.needs_input = True
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof and not self._output
+
+    @property
+    def unused_data(self) -> bytes:
+        return self._decompressor.unused_data + bytes(self._input) if self._decompressor.eof else b""
+
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        self._input += data
+        while self._input and not self._decompressor.eof and (max_length < 0 or len(self._output) < max_length):
+            self._output += self._decompressor.decompress(bytes(self._input[:ZSTANDARD_INPUT_SLICE]))
+            del self._input[:ZSTANDARD_INPUT_SLICE]
+        if max_length < 0:
+            max_length = len(self._output)
+        output = bytes(self._output[:max_length])
+        del self._output[:max_length]
+        self.needs_input = not self._output and (not self._input or self._decompressor.eof)
+        return output
+
+
+class _Decompressor:
+    """
+    Chunk-fed decompressor for one format.
+
+    Handles concatenated members/streams (e.g. `cat a.gz b.gz`, pbzip2 output),
+    which the one-shot decompressor objects stop at. Output comes in pieces of
+    at most STREAM_CHUNK bytes, so a small, highly compressed chunk cannot
+    expand all at once. Corrupt input raises ValueError.
+    """
+
+    def __init__(self, compression: str):
+        self._factory = _DECOMPRESSORS[compression]
+        if self._factory is None:
+            raise ValueError("zstd-compressed logs need Python 3.14+ or the 'zstandard' package.")
+        self._decompressor = self._factory()
+
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        """Decompress the next chunk of input, yielding the output piece by piece."""
+        try:
+            while True:
+                decompressor = self._decompressor
+                if decompressor.eof:
+                    # The member ended (possibly with the last chunk): what follows starts the next one
+                    data = decompressor.unused_data + data
+                    if not data:
+                        return
+                    self._decompressor = decompressor = self._factory()
+                piece = decompressor.decompress(data, STREAM_CHUNK)
+                if piece:
+                    yield piece
+                if decompressor.eof:
+                    data = b""
+                    continue
+                needs_input = getattr(decompressor, "needs_input", None)
+                if needs_input is None:
+                    # zlib hands back the input it did not get to
+                    data = decompressor.unconsumed_tail
+                    if not data and len(piece) < STREAM_CHUNK:
+                        return
+                else:
+                    data = b""
+                    if needs_input:
+                        return
+        except _DECOMPRESS_ERRORS as e:
+            raise ValueError(f"Compressed log is corrupt or truncated: {e}") from e
+
+    def close(self) -> None:
+        if not self._decompressor.eof:
+            raise ValueError("Compressed log is corrupt or truncated: the stream ended early.")
+
+
+class LogStreamParser:
+    """
+    Incremental parser for a log delivered as arbitrary byte chunks.
+
+    The first bytes decide whether the stream is gzip/bz2/xz/zstd compressed;
+    compressed input is decompressed chunk by chunk. Complete lines are
+    scanned with the bytes engine as they arrive and only an unterminated last
+    line is held back, so memory stays bounded by the chunk size. A line
+    longer than MAX_LINE_BYTES keeps only its first MAX_LINE_BYTES (its
+    timestamp and level still count), so input without newlines cannot pile up.
+
+    An "auto" format is detected once FORMAT_SAMPLE_BYTES of complete lines
+    (or the whole stream, if shorter) have arrived, so the result does not
+    depend on how the stream was chunked.
+    """
+
+    def __init__(self, templates: int = 0, log_format: str = AUTO_FORMAT):
+        self.stats = LogStats(templates, log_format)
+        self.compression: Optional[str] = None
+        self._decompressor: Optional[_Decompressor] = None
+        self._head: Optional[bytes] = b""    # held back until the compression is known
+        self._sample = bytearray()            # complete lines held back until the log format is known
+        self._partial = bytearray()           # unterminated last line, at most MAX_LINE_BYTES
+
+    def feed(self, data: bytes) -> None:
+        """Parse the next chunk of the stream."""
+        if self._head is not None:
+            self._head += data
+            if len(self._head) < _MAGIC_LENGTH:
+                return
+            data = self._start()
+        if self._decompressor is not None:
+            for piece in self._decompressor.decompress(data):
+                self._scan(piece)
+        else:
+            # Pieces no larger than the decompressed ones, so long lines are cut the same way
+            for start in range(0, len(data), STREAM_CHUNK):
+                self._scan(data[start:start + STREAM_CHUNK])
+
+    def close(self) -> LogStats:
+        """Finish the stream (parsing any unterminated last line) and return the aggregates."""
+        if self._head is not None:
+            self.feed(self._start())
+        if self._decompressor is not None:
+            self._decompressor.close()
+        if self.stats.log_format == AUTO_FORMAT:
+            # The stream ended before a full sample: detect from all of it
+            self._sample += self._partial
+            self._partial = bytearray()
+            self._scan_sample()
+        if self._partial:
+            line = bytes(self._partial)
+            self._partial = bytearray()
+            scan_buffer(line, 0, len(line), self.stats)
+        return self.stats
+
+    def _start(self) -> bytes:
+        head, self._head = self._head, None
+        self.compression = detect_compression(head)
+        if self.compression:
+            self._decompressor = _Decompressor(self.compression)
+        return head
+
+    def _hold(self, data: bytes, end: int) -> None:
+        # Add data[:end] to the held-back line, up to MAX_LINE_BYTES
+        room = MAX_LINE_BYTES - len(self._partial)
+        if room > 0:
+            self._partial += data[:min(end, room)]
+
+    def _scan(self, data: bytes) -> None:
+        cut = data.rfind(b"\n") + 1
+        if not cut:
+            self._hold(data, len(data))
+            return
+
+        start = 0
+        if self._partial:
+            # Complete the held-back line with the head of this chunk
+            start = data.find(b"\n") + 1
+            self._hold(data, start - 1)
+            line = bytes(self._partial) + b"\n"
+            if self.stats.log_format == AUTO_FORMAT:
+                self._sample += line
+            else:
+                scan_buffer(line, 0, len(line), self.stats)
+        if self.stats.log_format == AUTO_FORMAT:
+            self._sample += data[start:cut]
+        else:
+            scan_buffer(data, start, cut, self.stats)
+        self._partial = bytearray(data[cut:cut + MAX_LINE_BYTES])
+        if self.stats.log_format == AUTO_FORMAT and len(self._sample) >= FORMAT_SAMPLE_BYTES:
+            self._scan_sample()
+
+    def _scan_sample(self) -> None:
+        sample, self._sample = bytes(self._sample), bytearray()
+        if sample:
+            self.stats.log_format = _detect_head_format(sample, 0, len(sample))
+            scan_buffer(sample, 0, len(sample), self.stats)
+
+
+def scan_fileobj(fileobj, templates: int = 0, log_format: str = AUTO_FORMAT) -> LogStats:
+    """Stream a binary file object through a LogStreamParser (decompressing if needed)."""
+    parser = LogStreamParser(templates, log_format)
+    for chunk in iter(lambda: fileobj.read(STREAM_CHUNK), b""):
+        parser.feed(chunk)
+    return parser.close()
+
+
+def _analyze_stream(log_path: str, templates: int = 0, log_format: str = AUTO_FORMAT) -> LogStats:
+    stats = LogStats(templates, log_format)
+    # Split on "\n" only and decode leniently, as the bytes engine does
+    with open(log_path, "r", errors="replace", newline="\n") as f:
+        stats.add_lines(f)
+    return stats
+
+
+def split_ranges(buf, start: int, end: int, parts: int) -> list[tuple[int, int]]:
+    """Split buf[start:end] into up to `parts` newline-aligned (start, end) byte ranges."""
+    bounds = [start]
+    for i in range(1, parts):
+        offset = line_boundary(buf, start + (end - start) * i // parts, end)
+        if offset > bounds[-1]:
+            bounds.append(offset)
+    if bounds[-1] < end:
+        bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Workers are not forked from the (multi-threaded) server itself: a fork
+# server, started once with this module preloaded, forks them instead
+_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    context = multiprocessing.get_context(_POOL_START_METHOD)
+    if _POOL_START_METHOD == "forkserver":
+        context.set_forkserver_preload([__name__])
+    return ProcessPoolExecutor(max_workers=WORKER_PROCESSES, mp_context=context)
+
+
+def submit_work(fn: Callable, *args) -> Future:
+    """
+    Run fn(*args) in the process-wide pool of WORKER_PROCESSES workers.
+
+    The pool is started on first use. A pool broken by a dead worker (e.g.
+    OOM-killed) fails the calls it held and is replaced on the next submit.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool()
+        try:
+            return _pool.submit(fn, *args)
+        except BrokenProcessPool:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = _new_pool()
+            return _pool.submit(fn, *args)
+
+
+def shutdown_workers() -> None:
+    """Stop the shared worker processes once their work is done; the next submit starts new ones."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _analyze_range(
+    log_path: str, start: int, end: int, templates: int = 0, log_format: str = STANDARD_FORMAT
+) -> LogStats:
+    # Runs in a worker process, so it maps the file itself
+    stats = LogStats(templates, log_format)
+    with open(log_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            scan_buffer(mm, start, end, stats)
+    return stats
+
+
+def scan_file(
+    log_path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    workers: int = 1,
+    templates: int = 0,
+    log_format: str = STANDARD_FORMAT,
+) -> LogStats:
+    """
+    Scan bytes [start, end) of a file with the mmap engine.
+
+    With more than one worker the range is split into newline-aligned chunks
+    that are scanned in the shared worker pool (see submit_work()) and merged
+    back in file order, so the recent windows stay ordered. An "auto" format is detected from the start
+    of the range before it is split.
+    """
+    stats = LogStats(templates, log_format)
+    with open(log_path, "rb") as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        if start >= end:
+            return stats
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if stats.log_format == AUTO_FORMAT:
+                stats.log_format = _detect_head_format(mm, start, end)
+            parts = min(workers, os.cpu_count() or 1, -(-(end - start) // PARALLEL_MIN_CHUNK))
+            if parts <= 1:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                scan_buffer(mm, start, end, stats)
+                return stats
+            ranges = split_ranges(mm, start, end, parts)
+
+    futures = [submit_work(_analyze_range, log_path, start, end, templates, stats.log_format) for start, end in ranges]
+    try:
+        for future in futures:
+            stats.merge(future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+    return stats
+
+
+class _Checkpoint:
+    """Aggregates of a log up to its last complete line, plus the file identity they belong to."""
+
+    __slots__ = ("device", "inode", "size", "mtime_ns", "head", "offset", "committed", "stats")
+
+    def __init__(self, st: os.stat_result, head: bytes, offset: int, committed: LogStats, stats: LogStats):
+        self.device = st.st_dev
+        self.inode = st.st_ino
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.head = head
+        self.offset = offset          # first byte after the last complete line
+        self.committed = committed    # aggregates of bytes [0, offset)
+        self.stats = stats            # aggregates of the whole file, partial last line included
+
+    def same_file(self, st: os.stat_result) -> bool:
+        return (self.device, self.inode) == (st.st_dev, st.st_ino)
+
+    def unchanged(self, st: os.stat_result) -> bool:
+        return self.same_file(st) and (self.size, self.mtime_ns) == (st.st_size, st.st_mtime_ns)
+
+
+_checkpoints: "OrderedDict[tuple[str, str], _Checkpoint]" = OrderedDict()
+_checkpoints_lock = threading.Lock()
+
+
+def _analyze_incremental(log_path: str, workers: int = 1, log_format: str = AUTO_FORMAT) -> LogStats:
+    """
+    Analyze a log that only ever grows, parsing only the bytes appended since the last call.
+
+    Checkpoints are keyed by real path and log format, and validated against
+    (device, inode, size, mtime). A shrunk file, a new inode (rotation) or a
+    changed head (truncated and rewritten) falls back to a full rescan, and so
+    does an "auto" format detected from a short head that more lines overturn.
+    """
+    check_format(log_format)
+    real_path = os.path.realpath(log_path)
+    key = (real_path, log_format)
+    with open(real_path, "rb") as f:
+        st = os.fstat(f.fileno())
+        with _checkpoints_lock:
+            checkpoint = _checkpoints.get(key)
+            if checkpoint is not None:
+                _checkpoints.move_to_end(key)
+
+        if checkpoint is not None and checkpoint.unchanged(st):
+            return checkpoint.stats
+
+        head = f.read(CHECKPOINT_HEAD_BYTES)
+        size = st.st_size
+        resume = (
+            checkpoint is not None
+            and checkpoint.same_file(st)
+            and size >= checkpoint.size
+            and head[:len(checkpoint.head)] == checkpoint.head
+        )
+        start = checkpoint.offset if resume else 0
+
+        offset = start
+        if size > start:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = mm.rfind(b"\n", start, size) + 1 or start
+                if (
+                    resume
+                    and log_format == AUTO_FORMAT
+                    and checkpoint.offset < FORMAT_SAMPLE_BYTES
+                    and _detect_head_format(mm, 0, offset) != checkpoint.committed.log_format
+                ):
+                    start = 0
+                    resume = False
+        committed = checkpoint.committed.copy() if resume else LogStats(log_format=log_format)
+
+    committed.merge(scan_file(real_path, start, offset, workers, log_format=committed.log_format))
+    stats = committed.copy()
+    stats.merge(scan_file(real_path, offset, size, log_format=stats.log_format))
+
+    with _checkpoints_lock:
+        _checkpoints[key] = _Checkpoint(st, head, offset, committed, stats)
+        _checkpoints.move_to_end(key)
+        while len(_checkpoints) > CHECKPOINT_LIMIT:
+            _checkpoints.popitem(last=False)
+    return stats
+
+
+def parse_time_bound(value: str) -> bytes:
+    """
+    Normalize a start/end bound to the `YYYY-MM-DD HH:MM:SS` form used in logs.
+
+    Accepts anything datetime.fromisoformat() does ("2025-01-10 09:00:00",
+    "2025-01-10T09:00", "2025-01-10", ...). Log timestamps are fixed-width,
+    so normalized bounds compare correctly as plain bytes.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date/time.
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp '{value}'. Expected YYYY-MM-DD HH:MM:SS")
+    return moment.strftime("%Y-%m-%d %H:%M:%S").encode()
+
+
+def _next_timestamp(buf, offset: int, end: int) -> tuple[int, Optional[bytes]]:
+    """
+    Find the first timestamped line starting at or after `offset`.
+
+    Returns:
+        tuple: (line start, normalized timestamp), or (end, None) if there is none.
+    """
+    position = line_boundary(buf, offset, end)
+    while position < end:
+        match = LOG_LINE_BYTES.match(buf, position, end)
+        timestamp = match.group("timestamp")
+        if timestamp is not None:
+            return position, timestamp[:10] + b" " + timestamp[11:]
+        position = match.end()
+    return end, None
+
+
+def seek_timestamp(buf, end: int, bound: bytes, inclusive: bool = True) -> int:
+    """
+    Binary-search a time-ordered buffer for the first line stamped at or after `bound`.
+
+    With `inclusive` False, lines stamped exactly `bound` are skipped too, which
+    gives the exclusive end of a window that includes `bound`. Lines without a
+    timestamp belong to the timestamped line before them. Costs O(log n) line
+    probes instead of a scan.
+    """
+    low, high = 0, end
+    while low < high:
+        middle = (low + high) // 2
+        timestamp = _next_timestamp(buf, middle, end)[1]
+        if timestamp is None or timestamp > bound or (inclusive and timestamp == bound):
+            high = middle
+        else:
+            low = middle + 1
+    return _next_timestamp(buf, low, end)[0]
+
+
+def _time_range(log_path: str, start: Optional[str], end: Optional[str]) -> tuple[int, int]:
+    """Byte range of the lines stamped within [start, end] of a time-ordered log."""
+    start_bound = parse_time_bound(start) if start else None
+    end_bound = parse_time_bound(end) if end else None
+    if start_bound and end_bound and start_bound > end_bound:
+        raise ValueError("start must not be after end.")
+
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first = seek_timestamp(mm, size, start_bound) if start_bound else 0
+            last = seek_timestamp(mm, size, end_bound, inclusive=False) if end_bound else size
+    return first, max(first, last)
+
+
+def analyze_log_stream(
+    fileobj, log_file: str, filter_level: Optional[str] = None, log_format: str = AUTO_FORMAT
+) -> dict:
+    """
+    Analyze a log read from a binary file object (e.g. an upload).
+
+    The stream is parsed chunk by chunk and may be gzip/bz2/xz/zstd compressed.
 
-def analyze_log_file(log_path: str, filter_level: Optional[str] = None) -> dict:
+    Args:
+        fileobj: Readable binary file object.
+        log_file (str): Name reported as `log_file` in the result.
+        filter_level (str, optional): If given, only count lines with that log level.
+        log_format (str): Line format, or "auto" to detect it. Default "auto".
+
+    Raises:
+        ValueError: If the stream is empty or a compressed stream is corrupt.
+    """
+    stats = scan_fileobj(fileobj, log_format=log_format)
+    if not stats.total_lines:
+        raise ValueError("Log file is empty.")
+    return stats.summary(log_file, filter_level)
+
+
+def analyze_path(log_path: str, workers: int = 1, log_format: str = AUTO_FORMAT) -> LogStats:
+    """
+    Analyze a whole log file with the cheapest engine for it.
+
+    Plain files are memory-mapped and scanned as bytes (split across up to
+    `workers` processes when large); compressed files are decompressed while
+    streaming. This is the single entry point the stand-alone analyzers and
+    the CLI share with the API, so they all count lines the same way.
+
+    Raises:
+        FileNotFoundError: If the log file does not exist.
+        ValueError: If the format is unknown or a compressed file is corrupt.
+    """
+    if not os.path.exists(log_path):
+        raise FileNotFoundError(f"Log file not found: {log_path}")
+    if file_compression(log_path):
+        with open(log_path, "rb") as f:
+            return scan_fileobj(f, log_format=log_format)
+    return scan_file(log_path, workers=workers, log_format=log_format)
+
+
+def level_counts(stats: LogStats) -> dict:
+    """Lines per level in LOG_LEVELS order, plus the unrecognised lines under "UNKNOWN"."""
+    counts = {level: stats.counts.get(level, 0) for level in LOG_LEVELS}
+    counts["UNKNOWN"] = stats.unknown_lines
+    return counts
+
+
+def health_status(counts: dict) -> str:
+    """
+    Derive an overall health label from per-level counts.
+
+    Returns:
+        str: Critical | Degraded | Warning | Healthy
+    """
+    error_count = counts.get("ERROR", 0)
+    warning_count = counts.get("WARNING", 0)
+
+    if error_count > 10:
+        return "Critical"
+    if error_count > 3:
+        return "Degraded"
+    if warning_count > 5:
+        return "Warning"
+    return "Healthy"
+
+
+def validate_analyze_options(engine: str = "stream", workers: int = 1, incremental: bool = False,
+                             templates: int = 0, log_format: str = AUTO_FORMAT) -> None:
+    """
+    Check the analyze_log_file() options that do not depend on the file.
+
+    Raises:
+        ValueError: If the engine or format is unknown or the options conflict.
+    """
+    check_format(log_format)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(ENGINES)}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    if templates < 0:
+        raise ValueError("templates must not be negative.")
+    if templates and incremental:
+        raise ValueError("Template mining cannot be combined with incremental analysis.")
+
+
+def analyze_log_file(
+    log_path: str,
+    filter_level: Optional[str] = None,
+    engine: str = "stream",
+    workers: int = 1,
+    incremental: bool = False,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    templates: int = 0,
+    log_format: str = AUTO_FORMAT,
+) -> dict:
     """
     Analyze a log file and return a structured summary.
 
+    Both engines make a single pass with memory that does not grow with the
+    size of the log:
+    - **stream**: reads and decodes the file line by line.
+    - **mmap**: memory-maps the file and scans raw bytes, decoding only the
+      recent errors/warnings it returns. Much cheaper on very large files.
+
+    With `workers` > 1 the file is split into newline-aligned byte ranges that
+    are scanned by the mmap engine in a process pool and merged in order.
+
+    With `incremental` the aggregates are checkpointed per file, and a repeat
+    call on a grown file only scans the appended bytes (mmap engine).
+
+    Compressed logs (gzip, bz2, xz, zstd — detected by magic bytes) are
+    decompressed on the fly while streaming; nothing is written to disk and no
+    full decompressed copy is held in memory. They are always scanned
+    sequentially, so `engine`, `workers` and `incremental` do not apply.
+
+    With `start` and/or `end` only the lines stamped inside that (inclusive)
+    window are analyzed. The log must be in time order: the window is located
+    by binary search over line-aligned offsets, so the cost is proportional to
+    the window, not the file. A window is always scanned with the mmap engine.
+
+    With `templates` > 0 every message is also clustered into templates in the
+    same pass (see TemplateMiner) and the summary gains `top_templates`: that
+    many most frequent templates per level. The mmap engine then decodes every
+    line, and checkpoints cannot hold a miner, so `incremental` is refused.
+
+    `log_format` selects the line format from LOG_FORMATS (standard, JSON
+    lines, RFC 5424 syslog, nginx/Apache access); "auto" detects it from the
+    first lines. Formats other than the standard one are decoded and parsed
+    line by line by every engine, and cannot use time windows.
+
     Args:
         log_path (str): Absolute or relative path to the .log file.
         filter_level (str, optional): If given, only count lines with that log level.
+        engine (str): Parsing engine, one of ENGINES. Default "stream".
+        workers (int): Number of worker processes. Default 1 (no pool).
+        incremental (bool): Resume from the last checkpoint of this file. Default False.
+        start (str, optional): Window start, e.g. "2025-01-10 09:00:00".
+        end (str, optional): Window end (inclusive), e.g. "2025-01-10 09:15:00".
+        templates (int): Top message templates to report per level. Default 0 (off).
+        log_format (str): Line format, or "auto" to detect it. Default "auto".
 
     Returns:
         dict: Log summary with counts, recent errors, and health assessment.
 
     Raises:
         FileNotFoundError: If the log file does not exist.
-        ValueError: If the log file is empty.
+        ValueError: If the log file is empty or corrupt, or the engine, workers,
+            window or templates option is invalid.
     """
+    validate_analyze_options(engine, workers, incremental, templates, log_format)
+
     if not os.path.exists(log_path):
         raise FileNotFoundError(f"Log file not found: {log_path}")
+    log_format = resolve_format(log_format, log_path)
+
+    if file_compression(log_path):
+        if start or end:
+            raise ValueError("Time windows are not supported for compressed logs.")
+        with open(log_path, "rb") as f:
+            stats = scan_fileobj(f, templates, log_format)
+        if not stats.total_lines:
+            raise ValueError("Log file is empty.")
+        return stats.summary(os.path.basename(log_path), filter_level)
 
-    with open(log_path, "r") as f:
-        lines = [line.strip() for line in f.readlines() if line.strip()]
+    if start or end:
+        if log_format != STANDARD_FORMAT:
+            raise ValueError(f"Time windows only support the standard log format (detected: {log_format}).")
+        first, last = _time_range(log_path, start, end)
+        if not os.path.getsize(log_path):
+            raise ValueError("Log file is empty.")
+        stats = scan_file(log_path, first, last, workers, templates)
+        result = stats.summary(os.path.basename(log_path), filter_level)
+        result["time_range"] = {"start": start, "end": end}
+        return result
 
-    if not lines:
+    if incremental:
+        stats = _analyze_incremental(log_path, workers, log_format)
+    elif engine == "mmap" or workers > 1:
+        stats = scan_file(log_path, workers=workers, templates=templates, log_format=log_format)
+    else:
+        stats = _analyze_stream(log_path, templates, log_format)
+
+    if not stats.total_lines:
         raise ValueError("Log file is empty.")
 
-    counts: dict[str, int] = defaultdict(int)
-    recent_errors: list[dict] = []
-    recent_warnings: list[dict] = []
-    unknown_lines = 0
-    parsed_entries = []
+    return stats.summary(os.path.basename(log_path), filter_level)
 
-    for line in lines:
-        match = LOG_PATTERN.match(line)
-        if match:
-            level = match.group("level")
-            timestamp = match.group("timestamp")
-            message = match.group("message").strip()
 
-            counts[level] += 1
+def expand_log_paths(log_paths: Optional[list[str]] = None, pattern: Optional[str] = None) -> list[str]:
+    """
+    Combine explicit paths and a glob pattern into one ordered list without duplicates.
 
-            entry = {"timestamp": timestamp, "level": level, "message": message}
-            parsed_entries.append(entry)
+    Explicit paths are kept even when missing, so they can be reported as failures.
 
-            if level == "ERROR":
-                recent_errors.append(entry)
-            elif level == "WARNING":
-                recent_warnings.append(entry)
-        else:
-            unknown_lines += 1
+    Raises:
+        ValueError: If nothing was given, or more than BATCH_FILE_LIMIT files match.
+    """
+    paths = list(log_paths or [])
+    if pattern:
+        # Stop matching as soon as the limit is exceeded, however many files there are
+        paths.extend(sorted(islice(glob.iglob(pattern, recursive=True), BATCH_FILE_LIMIT + 1)))
+    paths = list(dict.fromkeys(paths))
+
+    if not paths:
+        raise ValueError("No log files given or matched.")
+    if len(paths) > BATCH_FILE_LIMIT:
+        raise ValueError(f"Too many log files (more than {BATCH_FILE_LIMIT}).")
+    return paths
+
+
+def _file_stats(log_path: str, log_format: str = AUTO_FORMAT, workers: int = 1) -> LogStats:
+    # Runs in a worker process
+    stats = analyze_path(log_path, workers=workers, log_format=log_format)
+    if not stats.total_lines:
+        raise ValueError("Log file is empty.")
+    return stats
+
+
+def iter_log_files(
+    log_paths: list[str],
+    workers: int = 4,
+    log_format: str = AUTO_FORMAT,
+) -> Iterator[tuple[str, Union[LogStats, Exception]]]:
+    """
+    Analyze many log files concurrently, yielding results in input order.
+
+    Up to `workers` files are queued at once on the shared worker pool (see
+    submit_work()), one per process, each with the cheapest engine for it
+    (see analyze_path()); concurrent batches share its WORKER_PROCESSES
+    processes. A lone file is split across the workers instead, and a
+    single worker scans in-process.
 
-    # Apply level filter if requested
-    if filter_level:
-        filter_level = filter_level.upper()
-        filtered_count = counts.get(filter_level, 0)
+    Yields:
+        tuple: (path, LogStats), or (path, error) for a file that is missing,
+        empty, unreadable or corrupt, so one bad file does not fail the batch.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+
+    if workers == 1 or len(log_paths) == 1:
+        for path in log_paths:
+            try:
+                yield path, _file_stats(path, log_format, workers)
+            except (OSError, ValueError) as e:
+                yield path, e
+        return
+
+    paths = iter(log_paths)
+    pending: deque = deque()
+    try:
+        while True:
+            for path in islice(paths, workers - len(pending)):
+                pending.append((path, submit_work(_file_stats, path, log_format)))
+            if not pending:
+                return
+            path, future = pending.popleft()
+            try:
+                yield path, future.result()
+            except (OSError, ValueError) as e:
+                yield path, e
+    finally:
+        # A consumer that stops early should not leave the rest of the batch queued
+        for _, future in pending:
+            future.cancel()
+
+
+class FleetStats:
+    """Merged counts and health of a batch of files, built one iter_log_files() result at a time."""
+
+    def __init__(self):
+        self.stats = LogStats()
+        self.files_total = 0
+        self.health_breakdown = {status: 0 for status in HEALTH_ORDER}
+
+    def add(self, log_path: str, result: Union[LogStats, Exception], filter_level: Optional[str] = None) -> dict:
+        """Fold in one file's result and return its per-file record."""
+        self.files_total += 1
+        if isinstance(result, Exception):
+            return {"log_file": log_path, "error": str(result)}
+
+        summary = result.summary(log_path)
+        self.health_breakdown[summary["health_status"]] += 1
+        self.stats.merge(result)
+        return result.summary(log_path, filter_level) if filter_level else summary
+
+    def summary(self) -> dict:
+        analyzed = sum(self.health_breakdown.values())
+        counts = {level: self.stats.counts.get(level, 0) for level in LOG_LEVELS}
+        worst = max((s for s, n in self.health_breakdown.items() if n), key=HEALTH_ORDER.index, default=None)
         return {
-            "log_file": os.path.basename(log_path),
-            "filter_level": filter_level,
-            "total_lines": len(lines),
-            "matched_count": filtered_count,
+            "files_total": self.files_total,
+            "files_analyzed": analyzed,
+            "files_failed": self.files_total - analyzed,
+            "total_lines": self.stats.total_lines,
+            "unknown_lines": self.stats.unknown_lines,
+            "counts": counts,
+            "health_status": worst or "Unknown",
+            "health_breakdown": self.health_breakdown,
         }
 
-    # Health assessment
-    error_count = counts.get("ERROR", 0)
-    warning_count = counts.get("WARNING", 0)
 
-    if error_count > 10:
-        health = "Critical"
-    elif error_count > 3:
-        health = "Degraded"
-    elif warning_count > 5:
-        health = "Warning"
-    else:
-        health = "Healthy"
-
-    # Keep only the 5 most recent errors/warnings
-    recent_errors = recent_errors[-5:]
-    recent_warnings = recent_warnings[-5:]
-
-    return {
-        "log_file": os.path.basename(log_path),
-        "total_lines": len(lines),
-        "unknown_lines": unknown_lines,
-        "counts": {
-            "INFO": counts.get("INFO", 0),
-            "WARNING": counts.get("WARNING", 0),
-            "ERROR": counts.get("ERROR", 0),
-            "DEBUG": counts.get("DEBUG", 0),
-            "CRITICAL": counts.get("CRITICAL", 0),
-        },
-        "health_status": health,
-        "recent_errors": recent_errors,
-        "recent_warnings": recent_warnings,
-    }
+def analyze_log_files(
+    log_paths: list[str],
+    filter_level: Optional[str] = None,
+    workers: int = 4,
+) -> dict:
+    """
+    Analyze many log files concurrently in a bounded process pool.
+
+    Each file is scanned with the mmap engine (or streamed if compressed) in
+    its own auto-detected line format. A file that is missing, empty,
+    unreadable or corrupt is reported inline with an `error` and does not
+    fail the batch.
+
+    Args:
+        log_paths (list[str]): Files to analyze (see expand_log_paths()).
+        filter_level (str, optional): If given, per-file results only report that level.
+        workers (int): Maximum number of worker processes. Default 4.
+
+    Returns:
+        dict: `files` (per-file summaries in input order) and `fleet` (merged
+        counts, worst health status and a per-status breakdown).
+    """
+    fleet = FleetStats()
+    files = [fleet.add(path, result, filter_level) for path, result in iter_log_files(log_paths, workers)]
+    return {"files": files, "fleet": fleet.summary()}
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from typing import Optional
+
+
+# Drain-style template mining: messages are grouped by level and token count,
+# then by their first TEMPLATE_PREFIX_TOKENS tokens; within such a leaf a message
+# joins the most similar cluster if at least TEMPLATE_SIMILARITY of its tokens
+# match the cluster's template, and differing tokens become wildcards.
+TEMPLATE_PREFIX_TOKENS = 2
+TEMPLATE_SIMILARITY = 0.5
+# Children per tree node before new tokens share the wildcard branch
+TEMPLATE_MAX_CHILDREN = 100
+# Clusters kept per miner; the least recently matched one is evicted
+TEMPLATE_MAX_CLUSTERS = 1000
+# Templates reported per level by default
+TEMPLATE_TOP = 10
+
+WILDCARD = "<*>"
+# Tokens holding a digit (ids, IPs, durations, hex) are variables up front
+_DIGITS = frozenset("0123456789")
+
+
+class _Cluster:
+    __slots__ = ("level", "tokens", "count", "first_seen", "last_seen", "path")
+
+    def __init__(self, level: str, tokens: list[str], path: list):
+        self.level = level
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen: Optional[str] = None
+        self.last_seen: Optional[str] = None
+        # (node, key) pairs from the tree root down to the leaf holding the cluster; None once evicted
+        self.path: Optional[list] = path
+
+    def seen(self, count: int, first: Optional[str], last: Optional[str]) -> None:
+        self.count += count
+        if first is not None and (self.first_seen is None or first < self.first_seen):
+            self.first_seen = first
+        if last is not None and (self.last_seen is None or last > self.last_seen):
+            self.last_seen = last
+
+
+class TemplateMiner:
+    """
+    Online message template miner (Drain-style fixed-depth token tree).
+
+    Messages such as "Timeout connecting to 10.0.3.4" collapse into templates
+    like "Timeout connecting to <*>", counted per level with their first and
+    last timestamps. The cluster table is bounded: past `max_clusters` the
+    least recently matched cluster is evicted, so memory stays flat on
+    high-cardinality logs while the dominant templates survive.
+    """
+
+    __slots__ = ("top", "max_clusters", "_root", "_clusters", "_cache")
+
+    def __init__(self, top: int = TEMPLATE_TOP, max_clusters: int = TEMPLATE_MAX_CLUSTERS):
+        self.top = top
+        self.max_clusters = max_clusters
+        self._root: dict = {}
+        self._clusters: "OrderedDict[_Cluster, None]" = OrderedDict()
+        # (level, masked tokens) -> cluster, so repeated shapes skip the tree walk
+        self._cache: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def add(self, level: str, timestamp: Optional[str], message: str, count: int = 1) -> None:
+        """Assign one message (or `count` identical ones) to its template cluster."""
+        digits = _DIGITS
+        key = (level, tuple([
+            WILDCARD if not token.isalpha() and not digits.isdisjoint(token) else token
+            for token in message.split()
+        ]))
+        cluster = self._cache.get(key)
+        if cluster is None or cluster.path is None:
+            cluster = self._match(level, list(key[1]))
+            if len(self._cache) >= 4 * self.max_clusters:
+                self._cache.clear()
+            self._cache[key] = cluster
+        else:
+            self._clusters.move_to_end(cluster)
+
+        # Inlined _Cluster.seen(): this runs once per line
+        cluster.count += count
+        if timestamp is not None:
+            if cluster.first_seen is None or timestamp < cluster.first_seen:
+                cluster.first_seen = timestamp
+            if cluster.last_seen is None or timestamp > cluster.last_seen:
+                cluster.last_seen = timestamp
+
+    def merge(self, other: "TemplateMiner") -> None:
+        """Fold in the clusters mined from another section of the log."""
+        for cluster in other._clusters:
+            self._match(cluster.level, list(cluster.tokens)).seen(
+                cluster.count, cluster.first_seen, cluster.last_seen
+            )
+
+    def copy(self) -> "TemplateMiner":
+        clone = TemplateMiner(self.top, self.max_clusters)
+        clone.merge(self)
+        return clone
+
+    def top_templates(self, level: Optional[str] = None) -> dict:
+        """
+        The `top` most frequent templates per level, most frequent first.
+
+        Returns:
+            dict: level -> [{template, count, first_seen, last_seen}], only for
+            levels that had messages (just `level` when given).
+        """
+        by_level: dict[str, list[_Cluster]] = {}
+        for cluster in self._clusters:
+            if level is None or cluster.level == level:
+                by_level.setdefault(cluster.level, []).append(cluster)
+
+        return {
+            name: [
+                {
+                    "template": " ".join(cluster.tokens),
+                    "count": cluster.count,
+                    "first_seen": cluster.first_seen,
+                    "last_seen": cluster.last_seen,
+                }
+                for cluster in sorted(clusters, key=lambda c: c.count, reverse=True)[:self.top]
+            ]
+            for name, clusters in by_level.items()
+        }
+
+    def _match(self, level: str, tokens: list[str]) -> _Cluster:
+        path = self._path(level, tokens)
+        node, key = path[-1]
+        leaf = node[key]
+        best, best_score = None, -1.0
+        for cluster in leaf:
+            score = _similarity(cluster.tokens, tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+
+        if best is not None and best_score >= TEMPLATE_SIMILARITY:
+            best.tokens = [t if t == token else WILDCARD for t, token in zip(best.tokens, tokens)]
+            self._clusters.move_to_end(best)
+            return best
+
+        cluster = _Cluster(level, tokens, path)
+        leaf.append(cluster)
+        self._clusters[cluster] = None
+        if len(self._clusters) > self.max_clusters:
+            self._evict(self._clusters.popitem(last=False)[0])
+        return cluster
+
+    def _path(self, level: str, tokens: list[str]) -> list:
+        """Walk (creating as needed) the tree down to the leaf list for these tokens."""
+        path = [(self._root, (level, len(tokens)))]
+        node = self._root.setdefault((level, len(tokens)), {})
+        for token in tokens[:TEMPLATE_PREFIX_TOKENS]:
+            if token not in node and len(node) >= TEMPLATE_MAX_CHILDREN:
+                token = WILDCARD
+            path.append((node, token))
+            node = node.setdefault(token, {})
+        path.append((node, None))
+        node.setdefault(None, [])
+        return path
+
+    def _evict(self, cluster: _Cluster) -> None:
+        path, cluster.path = cluster.path, None
+        node, key = path[-1]
+        node[key].remove(cluster)
+        # Drop the branches the cluster leaves empty
+        for node, key in reversed(path):
+            if node[key]:
+                break
+            del node[key]
+
+
+def _similarity(template: list[str], tokens: list[str]) -> float:
+    if not tokens:
+        return 1.0
+    return sum(t == token for t, token in zip(template, tokens)) / len(tokens)
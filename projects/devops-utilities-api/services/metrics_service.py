@@ -1,36 +1,373 @@
+import heapq
+import os
+import threading
+import time
 import psutil
+from array import array
+from collections import deque
 from datetime import datetime, timedelta
+from itertools import chain
+from typing import Iterable, Optional
 
 
-def get_system_metrics(cpu_threshold: int = 80) -> dict:
+# Seconds between background samples (METRICS_SAMPLE_INTERVAL overrides it)
+SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "1.0"))
+
+# Seconds of CPU time measured for the very first sample, taken when the sampler starts
+SAMPLE_PRIME_INTERVAL = 0.1
+
+# Samples kept in the history ring (METRICS_HISTORY_SIZE overrides it): an hour at the default interval
+HISTORY_SIZE = int(os.environ.get("METRICS_HISTORY_SIZE", "3600"))
+# Most points a history query may return
+MAX_HISTORY_POINTS = 1000
+
+# History columns: gauges are summarised as sampled, cumulative counters as per-second rates
+HISTORY_GAUGES = ("cpu_percent", "memory_percent", "swap_percent", "disk_percent")
+HISTORY_COUNTERS = ("net_bytes_sent", "net_bytes_recv")
+
+# Seconds over which per-interface and per-disk I/O rates are averaged by default
+# (METRICS_IO_WINDOW overrides it), and the longest window that may be asked for
+IO_WINDOW = int(os.environ.get("METRICS_IO_WINDOW", "10"))
+MAX_IO_WINDOW = 300
+
+# Counters turned into per-second rates: (output name, counter fields summed)
+NIC_RATES = (
+    ("sent_bytes_per_second", ("bytes_sent",)),
+    ("recv_bytes_per_second", ("bytes_recv",)),
+    ("sent_packets_per_second", ("packets_sent",)),
+    ("recv_packets_per_second", ("packets_recv",)),
+    ("errors_per_second", ("errin", "errout")),
+    ("drops_per_second", ("dropin", "dropout")),
+)
+DISK_RATES = (
+    ("read_bytes_per_second", ("read_bytes",)),
+    ("write_bytes_per_second", ("write_bytes",)),
+    ("read_iops", ("read_count",)),
+    ("write_iops", ("write_count",)),
+)
+
+# Process listing: sort keys, and the most processes one call may return
+PROCESS_SORTS = ("cpu", "rss")
+MAX_PROCESS_TOP = 100
+# The only per-process fields read (one batched oneshot() read per process)
+PROCESS_ATTRS = ["pid", "name", "create_time", "cpu_times", "memory_info"]
+
+
+class MetricsSample:
+    """One reading of the system counters, taken by the MetricsSampler."""
+
+    __slots__ = (
+        "seq", "timestamp", "monotonic", "cpu_percent", "logical_cores", "physical_cores",
+        "memory", "swap", "disk", "net", "boot_time", "nics", "disks",
+    )
+
+    def __init__(self, seq: int, cpu_percent: float):
+        self.seq = seq
+        self.timestamp = time.time()
+        self.monotonic = time.monotonic()
+        self.cpu_percent = cpu_percent
+        self.logical_cores = psutil.cpu_count(logical=True)
+        self.physical_cores = psutil.cpu_count(logical=False)
+        self.memory = psutil.virtual_memory()
+        self.swap = psutil.swap_memory()
+        self.disk = psutil.disk_usage("/")
+        self.net = psutil.net_io_counters()
+        self.boot_time = psutil.boot_time()
+        self.nics = psutil.net_io_counters(pernic=True)
+        self.disks = psutil.disk_io_counters(perdisk=True) or {}
+
+    @property
+    def age(self) -> float:
+        """Seconds since the sample was taken."""
+        return time.monotonic() - self.monotonic
+
+
+class MetricsHistory:
+    """
+    Fixed-size ring of past samples, one array('d') per metric.
+
+    Memory is allocated once (8 bytes per metric per slot) and the oldest
+    sample is overwritten when the ring is full. Queries locate their window
+    by binary search over the sample times and aggregate over memoryview
+    spans of the columns, so they never copy the ring.
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        if size < 2:
+            raise ValueError("size must be at least 2.")
+        self.size = size
+        self._timestamps = array("d", bytes(8 * size))
+        self._columns = {name: array("d", bytes(8 * size)) for name in HISTORY_GAUGES + HISTORY_COUNTERS}
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, sample: MetricsSample) -> None:
+        values = (
+            sample.cpu_percent, sample.memory.percent, sample.swap.percent, sample.disk.percent,
+            sample.net.bytes_sent, sample.net.bytes_recv,
+        )
+        with self._lock:
+            slot = self._next
+            self._timestamps[slot] = sample.timestamp
+            for column, value in zip(self._columns.values(), values):
+                column[slot] = value
+            self._next = (slot + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+
+    def _slot(self, row: int) -> int:
+        # Rows count from the oldest sample kept
+        return (self._next - self._count + row) % self.size
+
+    def _span(self, column: array, lo: int, hi: int) -> tuple[memoryview, ...]:
+        """The values of rows [lo, hi) as at most two zero-copy slices of the ring."""
+        if lo >= hi:
+            return ()
+        view = memoryview(column)
+        first = self._slot(lo)
+        last = first + (hi - lo)
+        if last <= self.size:
+            return (view[first:last],)
+        return view[first:], view[:last - self.size]
+
+    def _values(self, column: array, lo: int, hi: int) -> Iterable[float]:
+        return chain.from_iterable(self._span(column, lo, hi))
+
+    def _row_at(self, timestamp: float) -> int:
+        """The first row sampled at or after `timestamp`."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamps[self._slot(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def downsample(self, window: float, step: float, now: Optional[float] = None) -> list[dict]:
+        """
+        Summarise the last `window` seconds in `step`-second buckets.
+
+        Buckets are aligned to multiples of `step` since the epoch and
+        buckets without samples are left out. Each point holds the min, avg
+        and max of every gauge and of the per-second rate of every counter
+        (a counter that went backwards, e.g. after a reset, is skipped).
+        """
+        now = time.time() if now is None else now
+        points = []
+        with self._lock:
+            timestamps = self._timestamps
+            row = self._row_at(now - window)
+            while row < self._count:
+                bucket = timestamps[self._slot(row)] // step * step
+                end = self._row_at(bucket + step)
+                point = {
+                    "timestamp": datetime.fromtimestamp(bucket).isoformat(),
+                    "samples": end - row,
+                }
+                for name in HISTORY_GAUGES:
+                    segments = self._span(self._columns[name], row, end)
+                    point[name] = {
+                        "min": round(min(min(segment) for segment in segments), 2),
+                        "avg": round(sum(sum(segment) for segment in segments) / (end - row), 2),
+                        "max": round(max(max(segment) for segment in segments), 2),
+                    }
+                # Rates need the previous sample, which may lie before the bucket
+                start = max(row, 1)
+                for name in HISTORY_COUNTERS:
+                    column = self._columns[name]
+                    count, low, high, total = 0, float("inf"), float("-inf"), 0.0
+                    for previous, value, t_previous, t in zip(
+                        self._values(column, start - 1, end - 1), self._values(column, start, end),
+                        self._values(timestamps, start - 1, end - 1), self._values(timestamps, start, end),
+                    ):
+                        if value < previous or t <= t_previous:
+                            continue
+                        rate = (value - previous) / (t - t_previous)
+                        count += 1
+                        low, high, total = min(low, rate), max(high, rate), total + rate
+                    point[f"{name}_per_second"] = {
+                        "min": round(low, 2), "avg": round(total / count, 2), "max": round(high, 2),
+                    } if count else None
+                points.append(point)
+                row = end
+        return points
+
+
+class MetricsSampler:
+    """
+    Collect system metrics on a fixed cadence in a background thread.
+
+    Requests read the latest MetricsSample instead of measuring themselves,
+    so they never sleep: CPU usage is the average over the interval between
+    two samples (psutil.cpu_percent(interval=None)). The sample is replaced
+    as a whole, so readers need no lock. A sample that fails to collect
+    keeps the previous one, whose age then shows it is stale. Every sample
+    is also recorded in a fixed-size MetricsHistory.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, history_size: int = HISTORY_SIZE):
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+        self.interval = interval
+        self.history = MetricsHistory(history_size)
+        # Recent samples, to average I/O rates over up to MAX_IO_WINDOW seconds
+        self._recent: deque[MetricsSample] = deque(maxlen=int(MAX_IO_WINDOW / interval) + 1)
+        self._latest: Optional[MetricsSample] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Take a first sample and start the sampling thread (no-op if it is running)."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            if self._latest is None:
+                self._sample(psutil.cpu_percent(interval=SAMPLE_PRIME_INTERVAL))
+            else:
+                psutil.cpu_percent(interval=None)
+            self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the sampling thread; the last sample stays readable."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def snapshot(self) -> MetricsSample:
+        """The latest sample, starting the sampler first if it has not been started."""
+        sample = self._latest
+        if sample is None:
+            self.start()
+            sample = self._latest
+        return sample
+
+    def window(self, seconds: float) -> tuple[MetricsSample, MetricsSample]:
+        """The latest sample and the one taken about `seconds` before it (or the oldest kept)."""
+        latest = self.snapshot()
+        recent = self._recent
+        steps = min(round(seconds / self.interval), len(recent) - 1)
+        earlier = recent[-1 - steps] if steps > 0 else latest
+        return earlier, latest
+
+    def _sample(self, cpu_percent: float) -> None:
+        self._seq += 1
+        sample = MetricsSample(self._seq, cpu_percent)
+        self.history.append(sample)
+        self._recent.append(sample)
+        self._latest = sample
+
+    def _run(self) -> None:
+        next_at = time.monotonic() + self.interval
+        while not self._stop.wait(max(next_at - time.monotonic(), 0)):
+            try:
+                self._sample(psutil.cpu_percent(interval=None))
+            except Exception:
+                pass  # keep serving the previous sample
+            next_at += self.interval
+            if next_at < time.monotonic():
+                # Fell behind (e.g. the host was suspended): resume the cadence from now
+                next_at = time.monotonic() + self.interval
+
+
+sampler = MetricsSampler()
+
+
+def _io_rates(earlier: dict, latest: dict, rates: tuple, seconds: float) -> dict:
+    """Per-second rates of each device's counters between two samples."""
+    result = {}
+    for name, counters in latest.items():
+        before = earlier.get(name)
+        if before is None:
+            continue  # appeared within the window
+        deltas = [sum(getattr(counters, f) - getattr(before, f) for f in fields) for _, fields in rates]
+        if min(deltas) < 0:
+            continue  # counters were reset or wrapped
+        result[name] = {label: round(delta / seconds, 2) for (label, _), delta in zip(rates, deltas)}
+    return result
+
+
+def get_io_rates(window: int = IO_WINDOW) -> dict:
     """
-    Collect live system metrics.
+    Per-interface and per-disk throughput and IOPS, averaged over about `window` seconds.
+
+    Rates come from the counter deltas between two background samples
+    `window` seconds apart (fewer while the sampler has just started), so
+    nothing is measured on the request path. Disks that never did any I/O
+    (e.g. unused loop devices) are left out; a device whose counters went
+    backwards is skipped.
+    """
+    earlier, latest = sampler.window(window)
+    seconds = latest.monotonic - earlier.monotonic
+    if seconds <= 0:
+        return {"window_seconds": 0.0, "interfaces": {}, "disks": {}}
+
+    disks = _io_rates(earlier.disks, latest.disks, DISK_RATES, seconds)
+    for name, rates in disks.items():
+        before, counters = earlier.disks[name], latest.disks[name]
+        if hasattr(counters, "busy_time"):
+            # Share of the window the device was busy (Linux, milliseconds)
+            rates["busy_percent"] = round(min((counters.busy_time - before.busy_time) / (seconds * 10), 100.0), 2)
+    return {
+        "window_seconds": round(seconds, 3),
+        "interfaces": _io_rates(earlier.nics, latest.nics, NIC_RATES, seconds),
+        "disks": {name: rates for name, rates in disks.items() if any(latest.disks[name])},
+    }
+
+
+def get_system_metrics(cpu_threshold: int = 80, io_window: int = IO_WINDOW) -> dict:
+    """
+    Report the latest background sample of the system metrics.
 
     Args:
         cpu_threshold (int): CPU % value above which status is 'High CPU'. Default 80.
+        io_window (int): Seconds over which per-interface and per-disk I/O rates
+            are averaged (1 to MAX_IO_WINDOW). Default IO_WINDOW.
 
     Returns:
-        dict: CPU, Memory, Disk, Network I/O, Uptime, and System Health status.
+        dict: CPU, Memory, Disk (with per-disk I/O rates), Network I/O (with
+        per-interface rates), Uptime, System Health status, and when the sample
+        was taken (`sampled_at`, `sample_age_seconds`).
+
+    Raises:
+        ValueError: If io_window is out of range.
     """
+    if not 1 <= io_window <= MAX_IO_WINDOW:
+        raise ValueError(f"io_window must be between 1 and {MAX_IO_WINDOW} seconds.")
+    sample = sampler.snapshot()
+    io = get_io_rates(io_window)
+
     # ── CPU ──────────────────────────────────────────────
-    cpu_percent = psutil.cpu_percent(interval=1)
-    cpu_count_logical = psutil.cpu_count(logical=True)
-    cpu_count_physical = psutil.cpu_count(logical=False)
+    cpu_percent = sample.cpu_percent
+    cpu_count_logical = sample.logical_cores
+    cpu_count_physical = sample.physical_cores
 
     # ── Memory ───────────────────────────────────────────
-    vm = psutil.virtual_memory()
-    swap = psutil.swap_memory()
+    vm = sample.memory
+    swap = sample.swap
 
     # ── Disk ─────────────────────────────────────────────
-    disk = psutil.disk_usage("/")
+    disk = sample.disk
 
     # ── Network I/O ──────────────────────────────────────
-    net = psutil.net_io_counters()
+    net = sample.net
 
     # ── Uptime ───────────────────────────────────────────
-    boot_timestamp = psutil.boot_time()
-    boot_time = datetime.fromtimestamp(boot_timestamp)
-    uptime_seconds = (datetime.now() - boot_time).total_seconds()
+    boot_time = datetime.fromtimestamp(sample.boot_time)
+    uptime_seconds = (datetime.fromtimestamp(sample.timestamp) - boot_time).total_seconds()
     uptime_str = str(timedelta(seconds=int(uptime_seconds)))
 
     # ── Health Status ─────────────────────────────────────
@@ -63,13 +400,115 @@ def get_system_metrics(cpu_threshold: int = 80) -> dict:
             "total_gb": round(disk.total / (1024 ** 3), 2),
             "used_gb": round(disk.used / (1024 ** 3), 2),
             "free_gb": round(disk.free / (1024 ** 3), 2),
+            "io_window_seconds": io["window_seconds"],
+            "devices": io["disks"],
         },
         "network": {
             "bytes_sent_mb": round(net.bytes_sent / (1024 ** 2), 2),
             "bytes_recv_mb": round(net.bytes_recv / (1024 ** 2), 2),
             "packets_sent": net.packets_sent,
             "packets_recv": net.packets_recv,
+            "io_window_seconds": io["window_seconds"],
+            "interfaces": io["interfaces"],
         },
         "uptime": uptime_str,
         "system_status": status,
+        "sampled_at": datetime.fromtimestamp(sample.timestamp).isoformat(timespec="milliseconds"),
+        "sample_age_seconds": round(sample.age, 3),
+    }
+
+
+def get_metrics_history(window: int = 300, step: int = 10) -> dict:
+    """
+    Summarise the sampled metrics of the last `window` seconds, downsampled to
+    min/avg/max per `step` seconds.
+
+    Raises:
+        ValueError: If the window or step is not positive, the step exceeds the
+            window, or the query would return more than MAX_HISTORY_POINTS points.
+    """
+    if window <= 0 or step <= 0:
+        raise ValueError("window and step must be positive.")
+    if step > window:
+        raise ValueError("step must not exceed window.")
+    if window / step > MAX_HISTORY_POINTS:
+        raise ValueError(f"window / step must not exceed {MAX_HISTORY_POINTS} points.")
+
+    sampler.snapshot()  # starts the sampler if it is not running yet
+    history = sampler.history
+    return {
+        "window_seconds": window,
+        "step_seconds": step,
+        "sample_interval_seconds": sampler.interval,
+        "retention_seconds": round(history.size * sampler.interval),
+        "points": history.downsample(window, step),
+    }
+
+
+# CPU time per process at the previous listing, keyed by PID: (create_time, cpu seconds)
+_cpu_baselines: dict[int, tuple[float, float]] = {}
+_cpu_baseline_at: Optional[float] = None
+_processes_lock = threading.Lock()
+
+
+def get_top_processes(top: int = 10, sort: str = "cpu") -> dict:
+    """
+    List the processes using the most CPU or resident memory.
+
+    One process_iter() sweep reads only PROCESS_ATTRS, batched per process.
+    CPU usage is the share of one core used since the previous call, worked
+    out from the CPU times cached per PID (keyed with the creation time, so
+    a reused PID starts over). Nothing sleeps. A process without a baseline,
+    e.g. on the first call, reports its average since it started. Only the
+    top N rows are built.
+
+    Raises:
+        ValueError: If `sort` is unknown or `top` is out of range.
+    """
+    global _cpu_baselines, _cpu_baseline_at
+    if sort not in PROCESS_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'. Expected one of: {', '.join(PROCESS_SORTS)}")
+    if not 1 <= top <= MAX_PROCESS_TOP:
+        raise ValueError(f"top must be between 1 and {MAX_PROCESS_TOP}.")
+
+    memory_total = sampler.snapshot().memory.total
+    rows = []
+    baselines = {}
+    # One sweep at a time, so each measures against the one before it
+    with _processes_lock:
+        now = time.time()
+        elapsed = now - _cpu_baseline_at if _cpu_baseline_at is not None else None
+        for proc in psutil.process_iter(PROCESS_ATTRS):
+            info = proc.info
+            cpu_times, memory_info = info["cpu_times"], info["memory_info"]
+            created = info["create_time"] or 0.0
+            cpu_seconds = cpu_times.user + cpu_times.system if cpu_times else None
+            cpu_percent = None
+            if cpu_seconds is not None:
+                baselines[info["pid"]] = (created, cpu_seconds)
+                baseline = _cpu_baselines.get(info["pid"])
+                if baseline is not None and baseline[0] == created and elapsed:
+                    cpu_percent = (cpu_seconds - baseline[1]) / elapsed * 100
+                elif created and now > created:
+                    cpu_percent = cpu_seconds / (now - created) * 100
+            rss = memory_info.rss if memory_info else None
+            rows.append((info["pid"], info["name"], cpu_percent, rss))
+        _cpu_baselines, _cpu_baseline_at = baselines, now
+
+    column = 2 if sort == "cpu" else 3
+    top_rows = heapq.nlargest(top, rows, key=lambda row: row[column] or 0.0)
+    return {
+        "sort": sort,
+        "processes_total": len(rows),
+        "cpu_interval_seconds": round(elapsed, 3) if elapsed is not None else None,
+        "processes": [
+            {
+                "pid": pid,
+                "name": name,
+                "cpu_percent": round(max(cpu_percent, 0.0), 1) if cpu_percent is not None else None,
+                "rss_mb": round(rss / (1024 ** 2), 2) if rss is not None else None,
+                "memory_percent": round(rss / memory_total * 100, 2) if rss is not None else None,
+            }
+            for pid, name, cpu_percent, rss in top_rows
+        ],
     }
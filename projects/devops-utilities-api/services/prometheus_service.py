@@ -0,0 +1,124 @@
+import os
+import threading
+from typing import Optional
+
+from services.log_service import LOG_LEVELS, analyze_log_file
+from services.metrics_service import sampler
+from services.request_stats import request_stats
+
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "devops_"
+
+# Logs whose lines per level are exported (PROMETHEUS_LOG_FILES overrides it, os.pathsep-separated)
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "app.log")
+LOG_FILES = [path for path in os.environ.get("PROMETHEUS_LOG_FILES", DEFAULT_LOG_PATH).split(os.pathsep) if path]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Exposition:
+    """Builds a text exposition: one HELP/TYPE header per metric, then its samples."""
+
+    def __init__(self):
+        self._lines = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples) -> None:
+        """Add a metric; `samples` is a value or an iterable of (labels dict, value), optionally suffixed."""
+        name = METRIC_PREFIX + name
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+        if not isinstance(samples, (list, tuple)):
+            samples = [({}, samples)]
+        for sample in samples:
+            labels, value = sample[0], sample[1]
+            suffix = sample[2] if len(sample) > 2 else ""
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            self._lines.append(f"{name}{suffix}{{{label_text}}} {value!r}" if label_text else f"{name}{suffix} {value!r}")
+
+    def render(self) -> bytes:
+        return ("\n".join(self._lines) + "\n").encode("utf-8")
+
+
+def _system_metrics(out: _Exposition, sample) -> None:
+    out.metric("metrics_sample_timestamp_seconds", "gauge", "Unix time the system metrics were sampled.",
+               sample.timestamp)
+    out.metric("cpu_usage_percent", "gauge", "CPU usage over the last sample interval.", sample.cpu_percent)
+    out.metric("cpu_logical_cores", "gauge", "Logical CPU cores.", sample.logical_cores)
+    out.metric("memory_total_bytes", "gauge", "Total physical memory.", sample.memory.total)
+    out.metric("memory_used_bytes", "gauge", "Used physical memory.", sample.memory.used)
+    out.metric("memory_available_bytes", "gauge", "Memory available without swapping.", sample.memory.available)
+    out.metric("memory_usage_percent", "gauge", "Physical memory usage.", sample.memory.percent)
+    out.metric("swap_usage_percent", "gauge", "Swap usage.", sample.swap.percent)
+    disk = {"mountpoint": "/"}
+    out.metric("disk_total_bytes", "gauge", "Filesystem size.", [(disk, sample.disk.total)])
+    out.metric("disk_used_bytes", "gauge", "Filesystem space used.", [(disk, sample.disk.used)])
+    out.metric("disk_usage_percent", "gauge", "Filesystem usage.", [(disk, sample.disk.percent)])
+    out.metric("network_sent_bytes_total", "counter", "Bytes sent on all interfaces.", sample.net.bytes_sent)
+    out.metric("network_received_bytes_total", "counter", "Bytes received on all interfaces.", sample.net.bytes_recv)
+    out.metric("network_sent_packets_total", "counter", "Packets sent on all interfaces.", sample.net.packets_sent)
+    out.metric("network_received_packets_total", "counter", "Packets received on all interfaces.",
+               sample.net.packets_recv)
+    out.metric("boot_time_seconds", "gauge", "Unix time the host booted.", sample.boot_time)
+
+
+def _log_metrics(out: _Exposition) -> None:
+    lines = []
+    for log_path in LOG_FILES:
+        try:
+            # Checkpointed: only the lines appended since the last render are parsed
+            summary = analyze_log_file(log_path, incremental=True)
+        except (OSError, ValueError):
+            continue
+        log_file = os.path.basename(log_path)
+        lines += [({"log_file": log_file, "level": level}, summary["counts"][level]) for level in LOG_LEVELS]
+        lines.append(({"log_file": log_file, "level": "UNKNOWN"}, summary["unknown_lines"]))
+    out.metric("log_lines_total", "counter", "Log lines per level (UNKNOWN: unrecognised lines).", lines)
+
+
+def _request_metrics(out: _Exposition) -> None:
+    requests, durations, in_flight = request_stats.snapshot()
+    out.metric("api_requests_total", "counter", "HTTP requests handled, by route template and status.", [
+        ({"method": method, "route": route, "status": status}, count)
+        for (method, route, status), count in sorted(requests.items())
+    ])
+    duration_samples = []
+    for (method, route), (count, seconds) in sorted(durations.items()):
+        labels = {"method": method, "route": route}
+        duration_samples += [(labels, round(seconds, 6), "_sum"), (labels, count, "_count")]
+    out.metric("api_request_duration_seconds", "summary", "Time spent handling HTTP requests.", duration_samples)
+    out.metric("api_requests_in_flight", "gauge", "HTTP requests being handled.", in_flight)
+
+
+_cache_lock = threading.Lock()
+_cached: Optional[tuple[int, bytes]] = None
+
+
+def render_metrics() -> bytes:
+    """
+    The Prometheus text exposition of the system, log and API request metrics.
+
+    The payload is rendered once per metrics sample and then served as is,
+    so a scrape between two samples does no work. Log and request figures
+    are as fresh as the sample they were rendered with.
+    """
+    global _cached
+    sample = sampler.snapshot()
+    cached = _cached
+    if cached is not None and cached[0] == sample.seq:
+        return cached[1]
+
+    with _cache_lock:
+        if _cached is not None and _cached[0] == sample.seq:
+            return _cached[1]
+        out = _Exposition()
+        _system_metrics(out, sample)
+        _log_metrics(out)
+        _request_metrics(out)
+        _cached = (sample.seq, out.render())
+        return _cached[1]
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import Counter
+
+
+# Route label of requests that matched no route, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    """Request counts per (method, route, status) and latency totals per (method, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._durations: dict[tuple[str, str], list] = {}
+        self.in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def record(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._requests[method, route, status] += 1
+            totals = self._durations.setdefault((method, route), [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def snapshot(self) -> tuple[dict, dict, int]:
+        """Copies of (requests, durations as (count, seconds), in-flight count)."""
+        with self._lock:
+            durations = {key: tuple(totals) for key, totals in self._durations.items()}
+            return dict(self._requests), durations, self.in_flight
+
+
+request_stats = RequestStats()
+
+
+def route_template(scope) -> str:
+    """The path template of the route that handled a request, e.g. /logs/analyze."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return UNMATCHED_ROUTE
+    # Routes of an included router may only know their path within it: restore the prefix
+    try:
+        matched = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError):
+        return path
+    full_path = scope["path"]
+    if matched and full_path.endswith(matched):
+        return full_path[:len(full_path) - len(matched)] + path
+    return path
+
+
+class RequestStatsMiddleware:
+    """
+    ASGI middleware that records every HTTP request in a RequestStats.
+
+    Requests are labelled with the route template (e.g. /logs/analyze), not
+    the raw path. It wraps `send` only to read the status, so streaming
+    responses pass through untouched. Their duration runs until the stream
+    ends.
+    """
+
+    def __init__(self, app, stats: RequestStats = request_stats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.stats.started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.stats.record(
+                scope["method"],
+                route_template(scope),
+                status,
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The project runs from its own directory (`from services.x import ...`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
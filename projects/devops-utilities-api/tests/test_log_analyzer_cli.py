@@ -0,0 +1,44 @@
+import gzip
+import lzma
+import os
+import subprocess
+import sys
+
+import pytest
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "day-06", "log_analyzer_cli.py")
+LOG = b"2025-01-10 09:00:00 INFO request handled\n" * 20000
+
+
+def _run_cli(*args):
+    return subprocess.run([sys.executable, CLI, *args], capture_output=True, text=True, timeout=60)
+
+
+@pytest.fixture
+def bad_logs(tmp_path):
+    truncated = tmp_path / "app.log.gz"
+    truncated.write_bytes(gzip.compress(LOG)[:-300])
+    xz = lzma.compress(LOG)
+    corrupt = tmp_path / "app.log.xz"
+    corrupt.write_bytes(xz[:60] + bytes(64) + xz[124:])
+    good = tmp_path / "app.log"
+    good.write_bytes(LOG)
+    return str(good), str(truncated), str(corrupt)
+
+
+def test_corrupt_compressed_log_exits_non_zero(bad_logs, tmp_path):
+    for path in bad_logs[1:]:
+        result = _run_cli("--file", path, "--out", str(tmp_path / "summary.txt"))
+        assert result.returncode == 1
+        assert "corrupt or truncated" in result.stdout
+        assert "Traceback" not in result.stderr
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_corrupt_compressed_log_among_many_exits_non_zero(bad_logs, tmp_path, jobs):
+    result = _run_cli("--jobs", jobs, "--file", *bad_logs, "--out", str(tmp_path / "summary.txt"))
+    assert result.returncode == 1
+    assert "Traceback" not in result.stderr
+    summary = (tmp_path / "summary.txt").read_text()
+    assert "INFO: 20000" in summary
+    assert summary.count("corrupt or truncated") == 2
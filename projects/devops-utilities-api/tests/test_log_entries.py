@@ -0,0 +1,56 @@
+import pytest
+
+from services import log_entries
+from services.log_entries import cached_entries, read_entries
+
+
+def _log_lines(first: int, last: int) -> str:
+    levels = ("INFO", "ERROR", "WARNING", "DEBUG", "CRITICAL")
+    return "".join(
+        f"2025-01-10 {9 + i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d} {levels[i % 5]} request {i}\n"
+        for i in range(first, last)
+    )
+
+
+def _assert_matches_fresh_load(entries, path):
+    fresh = read_entries(str(path))
+    assert list(entries) == list(fresh)
+    for level in (None, "ERROR"):
+        rows, fresh_rows = entries.select(level, "2025-01-10 09:10:00"), fresh.select(level, "2025-01-10 09:10:00")
+        assert entries.read(rows[3:40]) == fresh.read(fresh_rows[3:40])
+
+
+def test_growing_log_extends_the_cached_store(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text(_log_lines(0, 2000))
+    store = cached_entries(str(path))
+
+    appended = _log_lines(2000, 3000)
+    with open(path, "a") as f:
+        f.write(appended[:777])   # ends inside a line
+    assert cached_entries(str(path)) is store
+    _assert_matches_fresh_load(store, path)
+
+    with open(path, "a") as f:
+        f.write(appended[777:])
+    assert cached_entries(str(path)) is store
+    assert len(store) == 3000
+    _assert_matches_fresh_load(store, path)
+
+
+def test_rewritten_log_is_reloaded(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text(_log_lines(0, 2000))
+    cached_entries(str(path))
+    path.write_text(_log_lines(500, 2600))
+    entries = cached_entries(str(path))
+    assert len(entries) == 2100
+    _assert_matches_fresh_load(entries, path)
+
+
+def test_store_over_the_budget_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_entries, "ENTRIES_CACHE_BYTES", 10000)
+    path = tmp_path / "app.log"
+    path.write_text(_log_lines(0, 2000))
+    with pytest.raises(ValueError, match="too many entries"):
+        cached_entries(str(path))
@@ -0,0 +1,141 @@
+import bz2
+import gzip
+import io
+import lzma
+
+import pytest
+
+from services.log_service import (
+    MAX_LINE_BYTES,
+    STREAM_CHUNK,
+    LogStreamParser,
+    analyze_log_file,
+    analyze_log_files,
+    scan_fileobj,
+)
+
+COMPRESSORS = {"gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+
+
+def _log_lines(n: int, first: int = 0) -> bytes:
+    levels = (b"INFO", b"WARNING", b"ERROR")
+    return b"".join(
+        b"2025-01-10 %02d:%02d:%02d %s request %d handled\n" % (9 + i // 3600, i // 60 % 60, i % 60, levels[i % 3], i)
+        for i in range(first, first + n)
+    )
+
+
+# ── Compressed streams ───────────────────────────────────
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_member_ending_on_chunk_boundary(compression):
+    compress = COMPRESSORS[compression]
+    first, second = compress(_log_lines(3000)), compress(_log_lines(3000, 3000))
+    expected = scan_fileobj(io.BytesIO(_log_lines(6000))).summary("app.log")
+
+    parser = LogStreamParser()
+    parser.feed(first)
+    parser.feed(second)
+    assert parser.close().summary("app.log") == expected
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+@pytest.mark.parametrize("damage", ["corrupt", "truncated"])
+def test_bad_compressed_log_raises_value_error(compression, damage):
+    data = bytearray(COMPRESSORS[compression](_log_lines(5000)))
+    if damage == "corrupt":
+        data[len(data) // 2:len(data) // 2 + 64] = bytes(64)
+    else:
+        del data[len(data) // 2:]
+    with pytest.raises(ValueError, match="corrupt or truncated"):
+        scan_fileobj(io.BytesIO(bytes(data)))
+
+
+def test_compressed_chunk_is_expanded_in_bounded_pieces():
+    pieces = []
+    parser = LogStreamParser()
+    parser._scan = lambda data: pieces.append(len(data))
+    parser.feed(bz2.compress(_log_lines(1) * 200000))
+    assert max(pieces) <= STREAM_CHUNK
+    assert sum(pieces) == len(_log_lines(1)) * 200000
+
+
+# ── Long lines ───────────────────────────────────────────
+
+def test_unterminated_line_is_capped():
+    parser = LogStreamParser()
+    parser.feed(b"2025-01-10 09:00:00 ERROR ")
+    for _ in range(40):
+        parser.feed(b"x" * (256 << 10))
+    assert len(parser._partial) <= MAX_LINE_BYTES
+    stats = parser.close()
+    assert stats.total_lines == 1
+    assert stats.counts["ERROR"] == 1
+
+
+@pytest.mark.parametrize("chunk", [1000, STREAM_CHUNK, 8 << 20])
+def test_long_line_is_cut_the_same_way_for_any_chunking(chunk):
+    data = _log_lines(100) + b"2025-01-10 10:00:00 WARNING " + b"y" * (3 << 20) + b"\n" + _log_lines(100, 100)
+    expected = scan_fileobj(io.BytesIO(data)).summary("app.log")
+    parser = LogStreamParser()
+    for start in range(0, len(data), chunk):
+        parser.feed(data[start:start + chunk])
+    summary = parser.close().summary("app.log")
+    assert summary == expected
+    assert summary["total_lines"] == 201
+    assert summary["counts"]["WARNING"] == 68
+
+
+# ── Batches ──────────────────────────────────────────────
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_corrupt_compressed_file_does_not_fail_batch(tmp_path, workers):
+    xz = lzma.compress(_log_lines(300))
+    paths = []
+    for name, data in (
+        ("a.log", _log_lines(300)),
+        ("b.log.gz", gzip.compress(_log_lines(300))[:-200]),
+        ("c.log.xz", xz[:40] + bytes(64) + xz[104:]),
+        ("d.log.xz", xz),
+    ):
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(str(path))
+
+    result = analyze_log_files(paths, workers=workers)
+    files = result["files"]
+    assert [f["log_file"] for f in files] == paths
+    assert "corrupt or truncated" in files[1]["error"]
+    assert "corrupt or truncated" in files[2]["error"]
+    assert files[0]["total_lines"] == files[3]["total_lines"] == 300
+    assert result["fleet"]["files_analyzed"] == 2
+    assert result["fleet"]["files_failed"] == 2
+
+
+# ── Engines ──────────────────────────────────────────────
+
+# Lines on which Unicode-aware str handling and ASCII bytes handling could disagree
+AWKWARD_LINES = (
+    "2025-01-10\u00a009:00:01 ERROR no-break space inside the timestamp",
+    "2025-01-10 09:00:02\u00a0WARNING no-break space before the level",
+    "\u00a02025-01-10 09:00:03 ERROR leading no-break space",
+    "2025-01-10 09:00:04 INFO trailing no-break space\u00a0",
+    "\u00a0",
+    "\u2028",
+    "2025-01-10 09:00:0\u0665 ERROR Arabic-Indic digit",
+    "2025-01-10 09:00:05\tERROR tab separated",
+    "2025-01-10 09:00:06 DEBUG carriage\rreturn inside",
+    "\x1c2025-01-10 09:00:07 CRITICAL file separator",
+    "\x0b2025-01-10 09:00:08 WARNING vertical tab",
+    "  2025-01-10 09:00:09 ERROR indented\r",
+)
+
+
+@pytest.mark.parametrize("lines", [AWKWARD_LINES, ("2025-01-10 09:00:00 INFO first",) + AWKWARD_LINES])
+def test_stream_and_mmap_engines_agree(tmp_path, lines):
+    path = tmp_path / "app.log"
+    path.write_bytes(("\n".join(lines) + "\n").encode() + b"2025-01-10 09:00:10 ERROR bad \xff byte\n")
+    stream = analyze_log_file(str(path), engine="stream")
+    mmap = analyze_log_file(str(path), engine="mmap")
+    assert stream == mmap
+    assert stream["total_lines"] == len(lines) + 1